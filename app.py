@@ -1,13 +1,33 @@
-from flask import Flask, render_template, request, jsonify
+from flask import (Flask, render_template, request, jsonify, g, Response, has_request_context, send_file,
+                   stream_with_context)
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import json
 from typing import Any
 import os
 from pathlib import Path
 import uuid
+import hashlib
 import logging
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
-from recording_fetcher import RecordingFetcher
+from recording_fetcher import RecordingFetcher, gevent_patched
+from recording_cache import ParsedRecordingCache
+from frame_index import IndexedRecording, LiveRecording, RecordingUnavailable, is_valid_frame
+from grid_store import encode_grid, unpack_cells
+from frame_delta import compute_delta
+from compression import codec_for, open_text, choose_content_encoding, compress_body, available_codecs
+from replay_store import ReplaySessionStore
+from serializer import serializer, loads
+from bulk_prefetch import PrefetchJob, parse_recording_ref
+from render import RenderedFrameCache, available_formats, palette_from_color_map, render_image, render_png, MIMETYPES
+from summary import unpack_thumbnail
+from export import ExportQueue, available_export_formats, MIMETYPES as EXPORT_MIMETYPES, EXTENSIONS as EXPORT_EXTENSIONS
+from startup import Startup, warm_refs
+from metrics import registry, LOAD_SECONDS, PARSE_SECONDS, REQUEST_SECONDS, RESPONSE_BYTES, STREAMED_FRAMES
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -16,21 +36,166 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify and request.get_json through the serializer module (orjson/msgspec when installed)"""
+    
+    def dumps(self, obj, **kwargs):
+        # response() asks for compact separators, which the serializer always writes
+        if kwargs and kwargs != {'separators': (',', ':')}:
+            return super().dumps(obj, **kwargs)
+        try:
+            return serializer.dumps(obj).decode('utf-8')
+        except TypeError:
+            # Types only Flask's encoder knows (dates, dataclasses, ...)
+            return super().dumps(obj)
+    
+    def loads(self, s, **kwargs):
+        return super().loads(s, **kwargs) if kwargs else serializer.loads(s)
+
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+app.json = FastJSONProvider(app)
+# Enable CORS for all routes; grid shape headers must be readable by other origins
+CORS(app, expose_headers=['X-Grid-Layers', 'X-Grid-Height', 'X-Grid-Width', 'X-Grid-Bits'])
 
 # Environment configuration
 is_cloud = os.getenv('IS_CLOUD', '1') == '1'
 debug_mode = os.getenv('DEBUG', '0') == '1'
 
+# Session configuration
+SESSION_COOKIE = 'replay_session'
+max_sessions = int(os.getenv('MAX_SESSIONS', '256'))
+session_ttl = int(os.getenv('SESSION_TTL', '1800'))
+session_memory_mb = int(os.getenv('SESSION_MEMORY_MB', '512'))
+
+# Parsed recording cache configuration
+parsed_cache_mb = int(os.getenv('PARSED_CACHE_MB', '256'))
+
+# Frame range requests
+max_range_frames = int(os.getenv('MAX_RANGE_FRAMES', '200'))
+
+# On-disk recording cache limits (0 disables a limit)
+cache_max_mb = int(os.getenv('CACHE_MAX_MB', '2048'))
+cache_max_recordings = int(os.getenv('CACHE_MAX_RECORDINGS', '0'))
+cache_compress_after_hours = float(os.getenv('CACHE_COMPRESS_AFTER_HOURS', '0'))
+cache_compression = os.getenv('CACHE_COMPRESSION', 'gzip')
+if cache_compression not in available_codecs():
+    logger.warning(f"CACHE_COMPRESSION={cache_compression} is not available; using gzip")
+    cache_compression = 'gzip'
+
+# Response compression
+compress_min_bytes = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/octet-stream', 'text/html', 'text/css',
+                          'application/javascript', 'text/javascript'}
+
+# Bulk prefetch jobs
+max_prefetch_workers = int(os.getenv('MAX_PREFETCH_WORKERS', '4'))
+max_prefetch_items = int(os.getenv('MAX_PREFETCH_ITEMS', '1000'))
+max_prefetch_jobs = 50
+
+# Server-side frame images
+render_cache_mb = int(os.getenv('RENDER_CACHE_MB', '64'))
+default_render_scale = int(os.getenv('RENDER_SCALE', '8'))
+max_render_pixels = 4096 * 4096
+
+# Largest page of /api/search results
+max_search_results = int(os.getenv('MAX_SEARCH_RESULTS', '500'))
+
+# Thumbnails in the recordings list are scaled to about this many pixels on their longest side
+thumbnail_pixels = 128
+
+# Recording exports (GIF/APNG/MP4)
+export_workers = int(os.getenv('EXPORT_WORKERS', '2'))
+export_cache_mb = int(os.getenv('EXPORT_CACHE_MB', '1024'))
+default_export_scale = int(os.getenv('EXPORT_SCALE', '4'))
+default_export_fps = int(os.getenv('EXPORT_FPS', '5'))
+
+# Streaming playback (/api/stream); see README for running under gevent.
+# An open stream holds a sync worker for its whole length, so "auto" only streams under gevent
+streaming_mode = os.getenv('STREAMING', 'auto').lower()
+max_streams = int(os.getenv('MAX_STREAMS', '100'))
+max_stream_fps = 60
+stream_keepalive_seconds = 15
+
+# Startup: LAZY_STARTUP=1 builds the fetcher and caches in a background thread so the worker
+# answers health checks at once; WARM_RECORDINGS (and WARM_RECORDINGS_FILE) are downloaded and
+# opened before the worker reports ready, for at most WARM_TIMEOUT seconds
+lazy_startup = os.getenv('LAZY_STARTUP', '0') == '1'
+warm_recordings = os.getenv('WARM_RECORDINGS', '')
+warm_recordings_file = os.getenv('WARM_RECORDINGS_FILE', '')
+warm_timeout = float(os.getenv('WARM_TIMEOUT', '120'))
+# How long a request waits for a lazy startup before getting a 503
+startup_wait_seconds = float(os.getenv('STARTUP_WAIT_SECONDS', '30'))
+# Requests served before the shared components exist
+STARTUP_EXEMPT_ENDPOINTS = {'index', 'replay_url', 'static', 'api_health', 'api_health_ready'}
+
+DEFAULT_GAME_ID = "ft09-16726c5b26ff"
+DEFAULT_RECORDING_ID = "1ed47a81-fda5-4524-afd5-751d3ec30479"
+
+# Instrumentation: Server-Timing response headers and slow load warnings
+server_timing = os.getenv('SERVER_TIMING', '0') == '1'
+slow_load_seconds = float(os.getenv('SLOW_LOAD_SECONDS', '5'))
+
+@contextmanager
+def timed_phase(name: str):
+    """Record the duration of a phase of the current request for the Server-Timing header"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if server_timing and has_request_context():
+            g.setdefault('timings', []).append((name, time.perf_counter() - start))
+
+def observe_load(mode: str, seconds: float, name: str) -> None:
+    """Record a recording load and warn about slow ones"""
+    LOAD_SECONDS.observe(seconds, mode=mode)
+    if seconds > slow_load_seconds:
+        logger.warning(f"Slow {mode} load of {name}: {seconds:.2f}s")
+
+def parse_recording_file(filepath: str) -> list:
+    """Parse a JSONL recording into a list of frame dicts, skipping invalid lines"""
+    frames = []
+    error_count = 0
+    
+    with open_text(filepath) as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if line:
+                try:
+                    data = loads(line)
+                    if is_valid_frame(data):
+                        frames.append(data)
+                    else:
+                        error_count += 1
+                        logger.warning(f"Invalid frame structure at line {line_num}")
+                except ValueError as e:
+                    error_count += 1
+                    logger.warning(f"JSON decode error at line {line_num}: {e}")
+    
+    logger.info(f"Loaded {len(frames)} frames, {error_count} errors")
+    return frames
+
+def make_recording_key(identity: str, filepath: str = None) -> str:
+    """Short stable id for a recording's content, used in ETags and cache-busting URLs.
+    
+    Recordings fetched from the API never change, so their id alone identifies them;
+    local files also include their mtime and size.
+    """
+    if filepath:
+        stat = os.stat(filepath)
+        identity = f"{identity}:{stat.st_mtime_ns}:{stat.st_size}"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()[:16]
+
 class FrameVisualizer:
-    def __init__(self):
-        # Initialize recording fetcher
-        self.recording_fetcher = RecordingFetcher()
+    def __init__(self, recording_fetcher: RecordingFetcher = None, session_id: str = None,
+                 recording_cache: ParsedRecordingCache = None):
+        # Initialize recording fetcher (shared between sessions when provided)
+        self.recording_fetcher = recording_fetcher or RecordingFetcher()
+        # Parsed recordings shared between sessions; frames are never mutated
+        self.recording_cache = recording_cache
         
         # Default recording info
-        self.default_game_id = "ft09-16726c5b26ff"
-        self.default_recording_id = "1ed47a81-fda5-4524-afd5-751d3ec30479"
+        self.default_game_id = DEFAULT_GAME_ID
+        self.default_recording_id = DEFAULT_RECORDING_ID
         
         # Sample data from the JSON
         self.frame_data = [[[]]]
@@ -39,9 +204,16 @@ class FrameVisualizer:
         self.score = 0
         self.current_frame_index = 0
         self.frames = []
-        self.session_id = str(uuid.uuid4())
+        self.session_id = session_id or str(uuid.uuid4())
         self.level = 1
         
+        # Where the current frames came from, used to reload them in another worker
+        self.source = None
+        # Content id of the loaded recording (see make_recording_key)
+        self.recording_key = None
+        # Approximate memory held by the loaded frames (size of the parsed file)
+        self.estimated_bytes = 0
+        
         # Color mapping for grid values
         self.color_map = self.create_color_map()
         
@@ -49,7 +221,8 @@ class FrameVisualizer:
         self.load_times = []
         self.last_load_time = None
     
-    def create_color_map(self):
+    @staticmethod
+    def create_color_map():
         """Create color mapping for grid values"""
         return {
             0: ("#FFFFFFFF", 'White'),
@@ -70,7 +243,7 @@ class FrameVisualizer:
             15: ("#A356D6FF", 'Purple'),
         }
     
-    def load_recording(self, game_id: str = None, recording_id: str = None) -> dict:
+    def load_recording(self, game_id: str = None, recording_id: str = None, progressive: bool = False) -> dict:
         """Load recording from API and cache it with enhanced error handling"""
         start_time = datetime.now()
         
@@ -82,14 +255,20 @@ class FrameVisualizer:
             
             logger.info(f"Loading recording: {game_id}/{recording_id}")
             
+            if progressive and not self.recording_fetcher.get_cached_recording(game_id, recording_id):
+                return self.load_progressive(game_id, recording_id, start_time)
+            
             # Fetch and cache the recording
-            jsonl_path = self.recording_fetcher.fetch_and_cache_recording(game_id, recording_id)
+            with timed_phase('fetch'):
+                jsonl_path = self.recording_fetcher.fetch_and_cache_recording(game_id, recording_id)
             
             if jsonl_path:
-                result = self.load_file(jsonl_path)
+                result = self.load_file(jsonl_path, cache_key=f"{game_id}/{recording_id}")
                 if 'error' not in result:
+                    self.source = {"game_id": game_id, "recording_id": recording_id}
                     self.last_load_time = datetime.now() - start_time
                     self.load_times.append(self.last_load_time.total_seconds())
+                    observe_load('full', self.last_load_time.total_seconds(), f"{game_id}/{recording_id}")
                     logger.info(f"Recording loaded successfully in {self.last_load_time.total_seconds():.2f}s")
                 return result
             else:
@@ -99,35 +278,72 @@ class FrameVisualizer:
             logger.error(f"Error loading recording: {str(e)}")
             return {"error": f"Error loading recording: {str(e)}"}
     
-    def load_file(self, filepath: str) -> dict:
+    def load_progressive(self, game_id: str, recording_id: str, start_time: datetime) -> dict:
+        """Serve frames while the recording downloads in the background"""
+        progress = self.recording_fetcher.start_download(game_id, recording_id)
+        progress.frames_ready.wait(timeout=self.recording_fetcher.timeout)
+        if progress.done and progress.path and progress.builder is None:
+            # Another worker process downloaded the file while this one waited for the lock
+            result = self.load_file(progress.path, cache_key=f"{game_id}/{recording_id}")
+            if 'error' not in result:
+                self.source = {"game_id": game_id, "recording_id": recording_id}
+            return result
+        
+        frames = LiveRecording(progress)
+        if not len(frames):
+            if progress.done:
+                return {"error": "Failed to fetch recording from API"}
+            return {"error": "Timed out waiting for the first frame"}
+        
+        self.frames = frames
+        self.source = {"game_id": game_id, "recording_id": recording_id}
+        self.recording_key = make_recording_key(f"{game_id}/{recording_id}")
+        self.estimated_bytes = 0
+        self.current_frame_index = 0
+        first_frame_seconds = (datetime.now() - start_time).total_seconds()
+        observe_load('progressive', first_frame_seconds, f"{game_id}/{recording_id}")
+        logger.info(f"First frame of {game_id}/{recording_id} ready in {first_frame_seconds:.2f}s")
+        return self.load_current_frame()
+    
+    def recording_status(self) -> dict:
+        """How many frames can be navigated and whether the recording is complete"""
+        frames = self.frames
+        status = {
+            "frames_available": len(frames),
+            # Nothing loaded in this worker means nothing is known about the total yet
+            "total_frames_known": getattr(frames, 'complete', True) if len(frames) else False,
+            "source": self.source,
+        }
+        progress = getattr(frames, 'progress', None)
+        if progress is not None:
+            status["download"] = progress.to_dict()
+        return status
+    
+    def load_file(self, filepath: str, cache_key: str = None, use_cache: bool = True) -> dict:
         """Load frames from JSONL file"""
         if not filepath or not os.path.exists(filepath):
             return {"error": "File not found"}
         
         try:
-            self.frames = []
-            frame_count = 0
-            error_count = 0
+            # Build the new frame list before swapping it in so concurrent readers never see a partial list.
+            # Files that stay on disk are opened through their byte-offset index and decoded per frame;
+            # files that are about to be removed (uploads) are parsed eagerly.
+            mode = 'indexed' if use_cache else 'eager'
+            with timed_phase('parse'), PARSE_SECONDS.time(mode=mode):
+                if use_cache:
+                    if codec_for(filepath):
+                        # Compressed files are indexed through a plain working copy
+                        cache_key = cache_key or os.path.abspath(filepath)
+                        filepath = self.recording_fetcher.get_decompressed_path(filepath)
+                    frames = self.open_indexed(filepath, cache_key)
+                else:
+                    frames = parse_recording_file(filepath)
             
-            with open(filepath, 'r') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if line:
-                        try:
-                            data = json.loads(line)
-                            if 'data' in data and 'frame' in data['data']:
-                                self.frames.append(data)
-                                frame_count += 1
-                            else:
-                                error_count += 1
-                                logger.warning(f"Invalid frame structure at line {line_num}")
-                        except json.JSONDecodeError as e:
-                            error_count += 1
-                            logger.warning(f"JSON decode error at line {line_num}: {e}")
-            
-            logger.info(f"Loaded {frame_count} frames, {error_count} errors")
-            
-            if self.frames:
+            if frames:
+                self.frames = frames
+                self.source = {"filepath": filepath}
+                self.recording_key = make_recording_key(cache_key) if cache_key else make_recording_key(os.path.abspath(filepath), filepath)
+                self.estimated_bytes = getattr(frames, 'estimated_bytes', os.path.getsize(filepath))
                 self.current_frame_index = 0
                 return self.load_current_frame()
             else:
@@ -137,62 +353,476 @@ class FrameVisualizer:
             logger.error(f"Error loading file: {str(e)}")
             return {"error": f"Error loading file: {str(e)}"}
     
+    def touch_recording(self, source: dict = None) -> None:
+        """Mark the loaded recording and its working files as in use so the disk cache limits leave them alone"""
+        source = source or self.source
+        if not source:
+            return
+        fetcher = self.recording_fetcher
+        if 'game_id' in source:
+            fetcher.cache.touch(source['game_id'], source['recording_id'])
+        else:
+            filepath = source['filepath']
+            for path in (filepath, fetcher.get_index_path(filepath), fetcher.get_grid_path(filepath)):
+                fetcher.cache.touch_file(path)
+
+    def open_indexed(self, filepath: str, cache_key: str = None) -> IndexedRecording:
+        """Open a recording through its sidecar index, shared via the recording cache"""
+        index_path = self.recording_fetcher.get_index_path(filepath)
+        grid_path = self.recording_fetcher.get_grid_path(filepath)
+        loader = lambda path: IndexedRecording.open(path, index_path, grid_path)
+        if self.recording_cache:
+            return self.recording_cache.get_or_load(cache_key or os.path.abspath(filepath), filepath, loader)
+        return loader(filepath)
+    
     def load_current_frame(self) -> dict:
         """Load the current frame data"""
-        if 0 <= self.current_frame_index < len(self.frames):
-            frame_data = self.frames[self.current_frame_index]
-            
-            # Update game info
-            data = frame_data.get('data', {})
-            self.game_id = data.get('game_id', 'Unknown')
-            self.state = data.get('state', 'Unknown')
-            self.score = data.get('score', 0)
-            self.frame_data = data.get('frame', [[[]]])
-            
-            # Extract additional metadata
-            action_input = data.get('action_input', {})
-            reasoning = action_input.get('reasoning', {})
-            
-            # Get action information
-            action_chosen = reasoning.get('action_chosen', 'None') if reasoning else 'None'
-            agent_type = reasoning.get('agent_type', 'None') if reasoning else 'None'
-            model = reasoning.get('model', 'None') if reasoning else 'None'
-            
-            return {
-                "game_id": self.game_id,
-                "state": self.state,
-                "score": self.score,
-                "action_chosen": action_chosen,
+        return self.frame_payload(self.current_frame_index)
+    
+    def frame_payload(self, frame_index: int, lean: bool = False) -> dict:
+        """Build the response for a frame without depending on the current position"""
+        frames = self.frames
+        if 0 <= frame_index < len(frames):
+            payload = self.frame_metadata(frames, frame_index, lean=lean)
+            self.frame_data = frames[frame_index].get('data', {}).get('frame', [[[]]])
+            payload["frame_data"] = self.frame_data
+            if not lean:
+                payload["color_map"] = self.color_map
+            return payload
+        return {"error": "Invalid frame index"}
+    
+    def frame_metadata(self, frames, frame_index: int, lean: bool = False, with_reasoning: bool = False) -> dict:
+        """Per-frame fields shared by full frame and delta responses (no grid).
+        
+        ``lean`` leaves out the reasoning and session fields, which are served
+        by :meth:`frame_reasoning` and :meth:`recording_info` instead;
+        ``with_reasoning`` keeps the reasoning in a lean payload.
+        """
+        frame_data = frames.meta(frame_index) if hasattr(frames, 'meta') else frames[frame_index]
+        
+        # Update game info
+        data = frame_data.get('data', {})
+        self.game_id = data.get('game_id', 'Unknown')
+        self.state = data.get('state', 'Unknown')
+        self.score = data.get('score', 0)
+        
+        # Extract additional metadata
+        action_input = data.get('action_input', {})
+        reasoning = action_input.get('reasoning', {})
+        
+        # Get action information
+        action_chosen = reasoning.get('action_chosen', 'None') if reasoning else 'None'
+        agent_type = reasoning.get('agent_type', 'None') if reasoning else 'None'
+        model = reasoning.get('model', 'None') if reasoning else 'None'
+        
+        payload = {
+            "game_id": self.game_id,
+            "state": self.state,
+            "score": self.score,
+            "action_chosen": action_chosen,
+            "frame_index": frame_index + 1,
+            "total_frames": len(frames),
+            "frames_available": len(frames),
+            "total_frames_known": getattr(frames, 'complete', True),
+            "recording_key": self.recording_key,
+        }
+        if lean and with_reasoning:
+            payload["reasoning"] = reasoning
+        if not lean:
+            payload.update({
                 "agent_type": agent_type,
                 "model": model,
-                "frame_index": self.current_frame_index + 1,
-                "total_frames": len(self.frames),
-                "frame_data": self.frame_data,
                 "reasoning": reasoning,
                 "session_id": self.session_id,
                 "level": self.level,
-                "color_map": self.color_map,
-            }
-        return {"error": "Invalid frame index"}
+            })
+        return payload
     
-    def go_to_frame(self, frame_index: int) -> dict:
+    def frame_reasoning(self, frame_index: int) -> dict:
+        """Reasoning recorded with a frame, served separately from the grid"""
+        frames = self.frames
+        if not 0 <= frame_index < len(frames):
+            return {"error": f"Invalid frame index: {frame_index}; total frames: {len(frames)}"}
+        return self._reasoning_item(frames, frame_index)
+    
+    def reasoning_range(self, start: int, end: int) -> dict:
+        """Reasoning of frames ``[start, end)``, so a client stepping through lean frames fetches it in batches"""
+        frames = self.frames
+        end = min(end, len(frames), start + max_range_frames)
+        if not 0 <= start < end:
+            return {"error": f"Invalid frame range: [{start}, {end}); total frames: {len(frames)}"}
+        return {
+            "start": start,
+            "end": end,
+            "total_frames": len(frames),
+            "frames": [self._reasoning_item(frames, index) for index in range(start, end)],
+        }
+    
+    @staticmethod
+    def _reasoning_item(frames, frame_index: int) -> dict:
+        frame = frames.meta(frame_index) if hasattr(frames, 'meta') else frames[frame_index]
+        reasoning = frame.get('data', {}).get('action_input', {}).get('reasoning', {})
+        return {
+            "frame_index": frame_index + 1,
+            "action_chosen": reasoning.get('action_chosen', 'None') if reasoning else 'None',
+            "reasoning": reasoning,
+        }
+    
+    def recording_info(self) -> dict:
+        """Recording-level constants that do not change between frames"""
+        frames = self.frames
+        first = (frames.meta(0) if hasattr(frames, 'meta') else frames[0]) if len(frames) else {}
+        reasoning = first.get('data', {}).get('action_input', {}).get('reasoning', {}) or {}
+        return {
+            "game_id": first.get('data', {}).get('game_id', self.game_id),
+            "recording_key": self.recording_key,
+            "source": self.source,
+            "total_frames": len(frames),
+            "frames_available": len(frames),
+            "total_frames_known": getattr(frames, 'complete', True),
+            "agent_type": reasoning.get('agent_type', 'None'),
+            "model": reasoning.get('model', 'None'),
+            "level": self.level,
+            "color_map": self.color_map,
+        }
+    
+    def frame_delta(self, from_index: int, to_index: int, lean: bool = False) -> dict:
+        """Frame metadata plus the cells of the displayed layer that changed since ``from_index``"""
+        frames = self.frames
+        for index in (from_index, to_index):
+            if not 0 <= index < len(frames):
+                return {"error": f"Invalid frame index: {index}; total frames: {len(frames)}"}
+        
+        self.current_frame_index = to_index
+        payload = self.frame_metadata(frames, to_index, lean=lean)
+        payload["from_frame_index"] = from_index + 1
+        payload.update(compute_delta(frames, from_index, to_index))
+        return payload
+    
+    def frame_grid(self, frame_index: int) -> dict:
+        """Packed 4-bit grid of a frame with its shape, straight from the grid store when possible"""
+        frames = self.frames
+        if not 0 <= frame_index < len(frames):
+            return {"error": f"Invalid frame index: {frame_index}; total frames: {len(frames)}"}
+        
+        grids = getattr(frames, 'grids', None)
+        shape = grids.shape(frame_index) if grids is not None else None
+        if shape is not None:
+            layers, height, width = shape
+            packed = grids.packed(frame_index)
+        else:
+            encoded = encode_grid(frames[frame_index]['data']['frame'])
+            if encoded is None:
+                return {"error": "Frame grid cannot be packed"}
+            layers, height, width, packed = encoded
+        return {"layers": layers, "height": height, "width": width, "packed": packed}
+    
+    def frame_layer_cells(self, frame_index: int, layer: int = -1) -> dict:
+        """One layer of a frame grid as one byte per cell, for rendering"""
+        result = self.frame_grid(frame_index)
+        if 'error' in result:
+            return result
+        layers, height, width = result['layers'], result['height'], result['width']
+        if not -layers <= layer < layers:
+            return {"error": f"Invalid layer: {layer}; frame has {layers} layers"}
+        size = height * width
+        start = (layer % layers) * size
+        cells = unpack_cells(result['packed'], layers * size)[start:start + size]
+        return {"height": height, "width": width, "cells": cells}
+    
+    def frame_range(self, start: int, end: int, grid_only: bool = False, delta: bool = False,
+                    lean: bool = False, with_reasoning: bool = False) -> dict:
+        """Frames ``[start, end)`` in one response.
+        
+        ``grid_only`` drops per-frame metadata; ``delta`` sends every frame after the
+        first as changed runs against the previous one (see :meth:`frame_delta`).
+        ``with_reasoning`` keeps the reasoning of each frame in lean responses, so a
+        client buffering frames for playback needs no request per frame for it.
+        """
+        frames = self.frames
+        end = min(end, len(frames), start + max_range_frames)
+        if not 0 <= start < end:
+            return {"error": f"Invalid frame range: [{start}, {end}); total frames: {len(frames)}"}
+        
+        items = []
+        for index in range(start, end):
+            item = {"frame_index": index + 1} if grid_only else \
+                self.frame_metadata(frames, index, lean=lean, with_reasoning=with_reasoning)
+            if delta and index > start:
+                item.update(compute_delta(frames, index - 1, index))
+            else:
+                item["frame_data"] = frames[index].get('data', {}).get('frame', [[[]]])
+            items.append(item)
+        
+        return {
+            "start": start,
+            "end": end,
+            "total_frames": len(frames),
+            "frames_available": len(frames),
+            "total_frames_known": getattr(frames, 'complete', True),
+            "color_map": self.color_map,
+            "encoding": "delta" if delta else "full",
+            "frames": items,
+        }
+    
+    def stream_frames(self, start: int, fps: float, end: int = None, lean: bool = False,
+                      with_reasoning: bool = False):
+        """Yield frames from ``start`` paced at ``fps``: the first in full, later ones as deltas.
+
+        Yields ``None`` while waiting for a progressive download to reach the next
+        frame so the caller can send keep-alives. The frame sequence is captured up
+        front, so loading another recording into the session does not switch streams.
+        """
+        frames = self.frames
+        source = self.source
+        interval = 1.0 / fps
+        progress = getattr(frames, 'progress', None)
+        previous = None
+        index = start
+        next_at = time.monotonic()
+        while end is None or index < end:
+            if index >= len(frames):
+                # Stop once the recording is complete (or its download failed)
+                if getattr(frames, 'complete', True) or (progress is not None and progress.done):
+                    return
+                yield None
+                time.sleep(interval)
+                continue
+
+            self.current_frame_index = index
+            self.touch_recording(source)
+            payload = self.frame_metadata(frames, index, lean=lean, with_reasoning=with_reasoning)
+            if previous is None:
+                payload["frame_data"] = frames[index].get('data', {}).get('frame', [[[]]])
+                if not lean:
+                    payload["color_map"] = self.color_map
+            else:
+                payload["from_frame_index"] = previous + 1
+                payload.update(compute_delta(frames, previous, index))
+            yield payload
+            previous = index
+            index += 1
+
+            next_at += interval
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind (slow client or reads): carry on from now instead of bursting
+                next_at = time.monotonic()
+
+    def go_to_frame(self, frame_index: int, lean: bool = False) -> dict:
         """Go to specific frame"""
-        if 0 <= frame_index < len(self.frames):
+        frames = self.frames
+        if 0 <= frame_index < len(frames):
             self.current_frame_index = frame_index
-            return self.load_current_frame()
-        return {"error": f"Invalid frame index: {frame_index}; total frames: {len(self.frames)}"}
+            return self.frame_payload(frame_index, lean=lean)
+        return {"error": f"Invalid frame index: {frame_index}; total frames: {len(frames)}"}
+    
+
+
+# Shared fetcher and parsed recordings; replay state lives in one FrameVisualizer per session.
+# Built by init_components, at import or (LAZY_STARTUP=1) in a background thread;
+# never in export worker processes.
+recording_fetcher: RecordingFetcher = None
+recording_cache: ParsedRecordingCache = None
+session_store: ReplaySessionStore = None
+rendered_frames: RenderedFrameCache = None
+export_queue: ExportQueue = None
+
+def init_components() -> RecordingFetcher:
+    """Build the shared fetcher, caches and session store; returns the fetcher"""
+    global recording_fetcher, recording_cache, session_store, rendered_frames, export_queue
+    fetcher = RecordingFetcher(
+        pool_size=max(16, max_prefetch_workers),
+        max_cache_bytes=cache_max_mb * 1024 * 1024,
+        max_cache_entries=cache_max_recordings,
+        compress_after=cache_compress_after_hours * 3600,
+        cache_codec=cache_compression,
+        # Sessions may still be reading recordings they loaded, so never evict those
+        protect_seconds=session_ttl,
+    )
+    fetcher.backfill_indexes()
+    recording_cache = ParsedRecordingCache(max_bytes=parsed_cache_mb * 1024 * 1024)
+    session_store = ReplaySessionStore(
+        factory=lambda session_id: FrameVisualizer(recording_fetcher=recording_fetcher, session_id=session_id,
+                                                   recording_cache=recording_cache),
+        max_sessions=max_sessions,
+        ttl_seconds=session_ttl,
+        max_memory_bytes=session_memory_mb * 1024 * 1024,
+    )
+    rendered_frames = RenderedFrameCache(max_bytes=render_cache_mb * 1024 * 1024)
+    export_queue = ExportQueue(fetcher, os.path.join(fetcher.storage_dir, 'exports'),
+                               max_workers=export_workers, max_bytes=export_cache_mb * 1024 * 1024)
+    recording_fetcher = fetcher
+    return fetcher
+
+def open_warm_recording(game_id: str, recording_id: str) -> None:
+    """Open a cached recording into the parsed recording cache without a session"""
+    visualizer = FrameVisualizer(recording_fetcher=recording_fetcher, recording_cache=recording_cache)
+    result = visualizer.load_recording(game_id, recording_id)
+    if 'error' in result:
+        logger.warning(f"Could not warm {game_id}/{recording_id}: {result['error']}")
+
+startup = Startup(
+    initialize=init_components,
+    open_recording=open_warm_recording,
+    refs=warm_refs(warm_recordings, warm_recordings_file, default=f"{DEFAULT_GAME_ID}/{DEFAULT_RECORDING_ID}"),
+    warm_workers=max_prefetch_workers,
+    warm_timeout=warm_timeout,
+)
+# Spawned export workers re-import this module as __mp_main__; they only run export.py
+# code, so they must not build the components or warm the cache again
+if __name__ != '__mp_main__':
+    startup.start(background=lazy_startup)
+
+# Recent bulk prefetch jobs by id, oldest first
+prefetch_jobs: "OrderedDict[str, PrefetchJob]" = OrderedDict()
+prefetch_jobs_lock = threading.Lock()
+
+# Open /api/stream connections in this worker
+active_streams = 0
+active_streams_lock = threading.Lock()
+
+def get_session_id():
+    """Session id from the header, query string or cookie (in that order)"""
+    return (request.headers.get('X-Session-Id')
+            or request.args.get('session_id')
+            or request.cookies.get(SESSION_COOKIE))
+
+def get_visualizer() -> FrameVisualizer:
+    """Return the FrameVisualizer for the current request's session"""
+    if 'visualizer' not in g:
+        g.session_id, g.visualizer = session_store.get_or_create(get_session_id())
+    return g.visualizer
+
+def ensure_source_loaded(visualizer: FrameVisualizer, progressive: bool = False):
+    """Reload the recording named in the query string if this worker does not hold it.
     
+    Sessions are local to a worker process, so a request routed to a different
+    worker carries enough information to rebuild the state from the disk cache.
+    Also marks the held recording as in use, since every frame request comes through here.
+    """
+    visualizer.touch_recording()
+    game_id = request.args.get('game_id')
+    recording_id = request.args.get('recording_id')
+    if not game_id or not recording_id:
+        return None
+    if visualizer.frames and visualizer.source == {"game_id": game_id, "recording_id": recording_id}:
+        return None
+    if len(game_id) != 17 or len(recording_id) != 36:
+        return {"error": "Invalid game_id or recording_id"}
+    result = visualizer.load_recording(game_id, recording_id, progressive=progressive)
+    session_store.enforce_limits(keep=visualizer.session_id)
+    return result if 'error' in result else None
+
+def record_metrics_gauges():
+    """Expose the statistics the session store and caches already keep"""
+    registry.gauge('replay_active_sessions', 'Replay sessions held by this worker', lambda: len(session_store))
+    registry.gauge('replay_session_bytes', 'Approximate memory held by session frames',
+                   lambda: session_store.stats()['estimated_bytes'])
+    registry.gauge('replay_parsed_cache_entries', 'Recordings in the parsed recording cache',
+                   lambda: recording_cache.stats()['entries'])
+    registry.gauge('replay_parsed_cache_bytes', 'Approximate memory held by the parsed recording cache',
+                   lambda: recording_cache.stats()['total_bytes'])
+    registry.counter_function('replay_parsed_cache_lookups_total', 'Parsed recording cache lookups',
+                              lambda: {('hit',): recording_cache.stats()['hits'],
+                                       ('miss',): recording_cache.stats()['misses']},
+                              labelnames=('result',))
+    registry.gauge('replay_disk_cache_entries', 'Recordings in the on-disk cache',
+                   lambda: recording_fetcher.cache.stats()['entries'])
+    registry.gauge('replay_disk_cache_bytes', 'Size of the on-disk recording cache',
+                   lambda: recording_fetcher.cache.stats()['total_bytes'])
+    registry.counter_function('replay_rendered_frame_lookups_total', 'Rendered frame image cache lookups',
+                              lambda: {('hit',): rendered_frames.stats()['hits'],
+                                       ('miss',): rendered_frames.stats()['misses']},
+                              labelnames=('result',))
+    registry.gauge('replay_prefetch_jobs_active', 'Bulk prefetch jobs still running',
+                   lambda: sum(1 for job in list(prefetch_jobs.values()) if not job.done))
+    registry.gauge('replay_active_streams', 'Open /api/stream playback connections', lambda: active_streams)
+
+record_metrics_gauges()
 
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
 
-# Create global instance
-visualizer = FrameVisualizer()
+@app.before_request
+def wait_for_startup():
+    """Hold requests until the shared components exist; health checks and pages answer at once"""
+    if request.endpoint in STARTUP_EXEMPT_ENDPOINTS:
+        return None
+    startup.ensure_running()
+    if not startup.initialized.wait(startup_wait_seconds) or startup.error:
+        error = f"Server failed to start: {startup.error}" if startup.error else "Server is starting"
+        response = jsonify({"error": error, "startup": startup.to_dict()})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    return None
+
+# Registered before compress_response so it runs after it and sees the compressed size
+@app.after_request
+def observe_request(response):
+    """Record request latency and response size, and add the Server-Timing header"""
+    start = g.get('request_start')
+    if start is None:
+        return response
+    elapsed = time.perf_counter() - start
+    endpoint = request.endpoint or 'unmatched'
+    REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, status=str(response.status_code))
+    if not (response.direct_passthrough or response.is_streamed):
+        RESPONSE_BYTES.observe(response.calculate_content_length() or 0, endpoint=endpoint)
+    if server_timing:
+        timings = g.get('timings', []) + [('app', elapsed)]
+        response.headers['Server-Timing'] = ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings)
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON and binary responses with brotli or gzip when the client accepts it"""
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_content_encoding(request.headers.get('Accept-Encoding', ''))
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < compress_min_bytes:
+        return response
+    with timed_phase('compress'):
+        response.set_data(compress_body(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # The compressed body differs byte-for-byte, so its validator can only be weak
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def cacheable_response(payload: dict, etag: str, cache_control: str):
+    """JSON response with an ETag that answers If-None-Match with 304"""
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+@app.after_request
+def set_session_cookie(response):
+    """Persist the session id for clients that were assigned a new one"""
+    session_id = g.get('session_id')
+    if session_id and request.cookies.get(SESSION_COOKIE) != session_id:
+        response.set_cookie(SESSION_COOKIE, session_id, max_age=session_ttl, httponly=True, samesite='Lax')
+    return response
 
 @app.route('/')
 def index():
     """Main page with environment info"""
     return render_template('index.html', 
                          is_cloud=is_cloud, 
-                         debug_mode=debug_mode)
+                         debug_mode=debug_mode,
+                         streaming=streaming_enabled())
 
 @app.route('/<game_id>/<recording_id>')
 def replay_url(game_id, recording_id):
@@ -210,6 +840,7 @@ def replay_url(game_id, recording_id):
     return render_template('index.html', 
                          is_cloud=is_cloud, 
                          debug_mode=debug_mode,
+                         streaming=streaming_enabled(),
                          game_id=game_id,
                          recording_id=recording_id,
                          arcprize_url=arcprize_url)
@@ -219,8 +850,10 @@ def api_load_recording():
     """API endpoint to load a recording from API"""
     try:
         data = request.get_json()
+        visualizer = get_visualizer()
         game_id = data.get('game_id', visualizer.default_game_id)
         recording_id = data.get('recording_id', visualizer.default_recording_id)
+        progressive = bool(data.get('progressive', False))
         
         # Validate lengths if provided
         if game_id and len(game_id) != 17:
@@ -229,8 +862,10 @@ def api_load_recording():
         if recording_id and len(recording_id) != 36:
             return jsonify({"error": f"Invalid recording_id length: {len(recording_id)}, expected 36"}), 400
         
-        result = visualizer.load_recording(game_id, recording_id)
+        result = visualizer.load_recording(game_id, recording_id, progressive=progressive)
+        session_store.enforce_limits(keep=visualizer.session_id)
         if 'error' not in result:
+            result["source"] = visualizer.source
             return jsonify(result)
         else:
             return jsonify(result), 400
@@ -251,7 +886,9 @@ def api_load_file():
         if not filepath:
             return jsonify({"error": "No filepath provided"}), 400
         
+        visualizer = get_visualizer()
         result = visualizer.load_file(filepath)
+        session_store.enforce_limits(keep=visualizer.session_id)
         if 'error' not in result:
             return jsonify(result)
         else:
@@ -265,16 +902,445 @@ def api_load_file():
 def api_go_to_frame(frame_index):
     """API endpoint to go to specific frame"""
     try:
-        result = visualizer.go_to_frame(frame_index)
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer)
+        if error:
+            return jsonify(error), 400
+        result = visualizer.go_to_frame(frame_index, lean=request.args.get('lean') == '1')
         if 'error' not in result:
             return jsonify(result)
         else:
             return jsonify(result), 400
             
+    except RecordingUnavailable as e:
+        # Frames of a progressive load whose download failed
+        return jsonify({"error": str(e)}), 409
     except Exception as e:
         logger.error(f"Error in go_to_frame API: {str(e)}")
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+@app.route('/api/recording_info')
+def api_recording_info():
+    """API endpoint for recording-level constants (color map, agent, model, frame count)"""
+    try:
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer)
+        if error:
+            return jsonify(error), 400
+        if not visualizer.frames:
+            return jsonify({"error": "No recording loaded"}), 400
+        
+        info = visualizer.recording_info()
+        # Frame counts grow while a recording downloads, so revalidate on every use
+        etag = f"{info['recording_key']}-{info['frames_available']}-{int(info['total_frames_known'])}"
+        return cacheable_response(info, etag, 'private, no-cache')
+        
+    except RecordingUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error in recording_info API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/reasoning/<int:frame_index>')
+def api_reasoning(frame_index):
+    """API endpoint for the reasoning of one frame.
+    
+    Clients pass ``rec=<recording_key>`` so the URL names immutable content and
+    can be cached; a request for a different recording than the session holds is rejected.
+    """
+    try:
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer)
+        if error:
+            return jsonify(error), 400
+        recording_key = request.args.get('rec')
+        if recording_key and recording_key != visualizer.recording_key:
+            return jsonify({"error": "Recording changed; reload the recording"}), 409
+        
+        result = visualizer.frame_reasoning(frame_index)
+        if 'error' in result:
+            return jsonify(result), 400
+        cache_control = 'private, max-age=86400' if recording_key else 'private, no-cache'
+        return cacheable_response(result, f"{visualizer.recording_key}-{frame_index}", cache_control)
+        
+    except RecordingUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error in reasoning API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/reasoning')
+def api_reasoning_range():
+    """API endpoint for the reasoning of frames ``[start, end)``, cached like /api/reasoning/<index>"""
+    try:
+        start = request.args.get('start', 0, type=int)
+        end = request.args.get('end', start + 50, type=int)
+        
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer)
+        if error:
+            return jsonify(error), 400
+        recording_key = request.args.get('rec')
+        if recording_key and recording_key != visualizer.recording_key:
+            return jsonify({"error": "Recording changed; reload the recording"}), 409
+        
+        result = visualizer.reasoning_range(start, end)
+        if 'error' in result:
+            return jsonify(result), 400
+        # Only complete recordings are immutable; a range may grow while one downloads
+        cacheable = recording_key and getattr(visualizer.frames, 'complete', True)
+        cache_control = 'private, max-age=86400' if cacheable else 'private, no-cache'
+        return cacheable_response(result, f"{visualizer.recording_key}-{result['start']}-{result['end']}", cache_control)
+        
+    except RecordingUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error in reasoning range API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/recording_status')
+def api_recording_status():
+    """API endpoint to report how much of the session's recording is available"""
+    try:
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer, progressive=True)
+        if error:
+            return jsonify(error), 400
+        return jsonify(visualizer.recording_status())
+    except RecordingUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error in recording_status API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/fetch_progress/<game_id>/<recording_id>')
+def api_fetch_progress(game_id, recording_id):
+    """API endpoint to report the progress of a recording download"""
+    if len(game_id) != 17 or len(recording_id) != 36:
+        return jsonify({"error": "Invalid game_id or recording_id"}), 400
+    progress = recording_fetcher.get_progress(game_id, recording_id)
+    if progress is None:
+        cached = recording_fetcher.is_cached(game_id, recording_id)
+        return jsonify({"error": "No download in progress", "cached": cached}), 404
+    return jsonify(progress)
+
+@app.route('/api/prefetch', methods=['POST'])
+def api_prefetch():
+    """API endpoint to download many recordings into the cache in the background"""
+    try:
+        data = request.get_json() or {}
+        refs = data.get('recordings')
+        if not isinstance(refs, list) or not refs:
+            return jsonify({"error": "recordings must be a non-empty list of game_id/recording_id pairs"}), 400
+        if len(refs) > max_prefetch_items:
+            return jsonify({"error": f"At most {max_prefetch_items} recordings per prefetch"}), 400
+        workers = data.get('workers', max_prefetch_workers)
+        if isinstance(workers, bool) or not isinstance(workers, int) or workers < 1:
+            return jsonify({"error": "workers must be a positive integer"}), 400
+        workers = min(workers, max_prefetch_workers)
+
+        try:
+            job = PrefetchJob(recording_fetcher, refs, max_workers=workers)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        with prefetch_jobs_lock:
+            prefetch_jobs[job.job_id] = job
+            while len(prefetch_jobs) > max_prefetch_jobs:
+                prefetch_jobs.popitem(last=False)
+        job.start()
+        return jsonify(job.to_dict()), 202
+        
+    except Exception as e:
+        logger.error(f"Error in prefetch API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/prefetch/<job_id>')
+def api_prefetch_status(job_id):
+    """API endpoint reporting per-recording status of a bulk prefetch"""
+    with prefetch_jobs_lock:
+        job = prefetch_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown prefetch job"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/frames')
+def api_frames():
+    """API endpoint returning frames ``[start, end)`` in one (compressed) response"""
+    try:
+        start = request.args.get('start', 0, type=int)
+        end = request.args.get('end', start + 50, type=int)
+        grid_only = request.args.get('grid_only') == '1'
+        delta = request.args.get('encoding') == 'delta'
+        
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer)
+        if error:
+            return jsonify(error), 400
+        result = visualizer.frame_range(start, end, grid_only=grid_only, delta=delta,
+                                        lean=request.args.get('lean') == '1',
+                                        with_reasoning=request.args.get('reasoning') == '1')
+        if 'error' not in result:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except RecordingUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error in frames API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/frame_delta/<int:from_index>/<int:to_index>')
+def api_frame_delta(from_index, to_index):
+    """API endpoint returning the cells that changed between two frames.
+    
+    ``runs`` holds ``[row, col, [values...]]`` for the last (displayed) layer;
+    ``full`` holds the whole layer instead when the grid shape changed.
+    """
+    try:
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer)
+        if error:
+            return jsonify(error), 400
+        result = visualizer.frame_delta(from_index, to_index, lean=request.args.get('lean') == '1')
+        if 'error' not in result:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+            
+    except RecordingUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error in frame_delta API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+def streaming_enabled() -> bool:
+    """Whether /api/stream is served; advertised to the UI, which polls frames otherwise"""
+    if streaming_mode == 'auto':
+        return gevent_patched()
+    return streaming_mode in ('1', 'true', 'yes', 'on')
+
+def sse_event(event: str, payload: dict, event_id: int = None) -> bytes:
+    """One Server-Sent Events message with a JSON data line"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode('utf-8') + serializer.dumps(payload) + b"\n\n"
+
+@app.route('/api/stream')
+def api_stream():
+    """Server-Sent Events stream pushing frames from ``start`` at ``fps``.
+
+    The first event carries the full grid and later ones only the changed runs
+    (as in /api/frame_delta). Each event id is the 1-based frame index, so an
+    EventSource that reconnects resumes after the last frame it received.
+    """
+    global active_streams
+    if not streaming_enabled():
+        return jsonify({"error": "Streaming is disabled on this server; use /api/go_to_frame"}), 503
+    try:
+        start = request.args.get('start', 0, type=int)
+        end = request.args.get('end', None, type=int)
+        fps = min(max(request.args.get('fps', 5, type=float), 0.1), max_stream_fps)
+        lean = request.args.get('lean') == '1'
+        last_event_id = request.headers.get('Last-Event-ID', '')
+        if last_event_id.isdigit():
+            start = int(last_event_id)
+
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer)
+        if error:
+            return jsonify(error), 400
+        if not 0 <= start < len(visualizer.frames):
+            return jsonify({"error": f"Invalid frame index: {start}; total frames: {len(visualizer.frames)}"}), 400
+
+        with active_streams_lock:
+            if active_streams >= max_streams:
+                return jsonify({"error": "Too many open streams; use /api/go_to_frame"}), 503
+            active_streams += 1
+        frames = visualizer.stream_frames(start, fps, end=end, lean=lean,
+                                          with_reasoning=request.args.get('reasoning') == '1')
+    except Exception as e:
+        logger.error(f"Error in stream API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+    def generate():
+        try:
+            last_sent = time.monotonic()
+            for payload in frames:
+                if payload is None:
+                    if time.monotonic() - last_sent < stream_keepalive_seconds:
+                        continue
+                    yield b": keep-alive\n\n"
+                else:
+                    yield sse_event('frame', payload, event_id=payload['frame_index'])
+                    STREAMED_FRAMES.inc()
+                last_sent = time.monotonic()
+            yield sse_event('end', {"total_frames": len(visualizer.frames)})
+        except Exception as e:
+            logger.error(f"Error in stream API: {str(e)}")
+            yield sse_event('error', {"error": str(e)})
+
+    def release_stream():
+        global active_streams
+        with active_streams_lock:
+            active_streams -= 1
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    # Runs when the server closes the response, including when the client disconnects
+    response.call_on_close(release_stream)
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx and similar proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/frame_grid/<int:frame_index>')
+def api_frame_grid(frame_index):
+    """API endpoint returning a frame's grid as binary cells.
+    
+    Cells are packed two per byte (first cell in the high nibble) unless
+    ``format=u8`` asks for one byte per cell; the shape is in X-Grid-* headers.
+    """
+    try:
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer)
+        if error:
+            return jsonify(error), 400
+        result = visualizer.frame_grid(frame_index)
+        if 'error' in result:
+            return jsonify(result), 400
+        
+        bits = 4
+        body = result['packed']
+        if request.args.get('format') == 'u8':
+            bits = 8
+            body = unpack_cells(body, result['layers'] * result['height'] * result['width'])
+        response = Response(body, mimetype='application/octet-stream')
+        response.headers['X-Grid-Layers'] = str(result['layers'])
+        response.headers['X-Grid-Height'] = str(result['height'])
+        response.headers['X-Grid-Width'] = str(result['width'])
+        response.headers['X-Grid-Bits'] = str(bits)
+        return response
+        
+    except RecordingUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error in frame_grid API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/frame_image/<int:frame_index>')
+def api_frame_image(frame_index):
+    """API endpoint rendering a frame to PNG (or WebP with Pillow installed).
+    
+    ``scale`` is the size of a cell in pixels and ``layer`` the grid layer
+    (default: the last one, which the UI displays). Like the reasoning endpoint,
+    ``rec=<recording_key>`` makes the URL immutable and cacheable.
+    """
+    try:
+        visualizer = get_visualizer()
+        error = ensure_source_loaded(visualizer)
+        if error:
+            return jsonify(error), 400
+        recording_key = request.args.get('rec')
+        if recording_key and recording_key != visualizer.recording_key:
+            return jsonify({"error": "Recording changed; reload the recording"}), 409
+        
+        image_format = request.args.get('format', 'png').lower()
+        if image_format not in available_formats():
+            return jsonify({"error": f"Unsupported image format: {image_format}; available: {available_formats()}"}), 400
+        scale = request.args.get('scale', default_render_scale, type=int)
+        layer = request.args.get('layer', -1, type=int)
+        if not 1 <= scale <= 64:
+            return jsonify({"error": "scale must be between 1 and 64"}), 400
+        
+        etag = f"{visualizer.recording_key}-{frame_index}-{layer}-{scale}.{image_format}"
+        body = rendered_frames.get(etag)
+        if body is None:
+            result = visualizer.frame_layer_cells(frame_index, layer)
+            if 'error' in result:
+                return jsonify(result), 400
+            height, width = result['height'], result['width']
+            if height * width * scale * scale > max_render_pixels:
+                return jsonify({"error": "Requested image is too large; use a smaller scale"}), 400
+            with timed_phase('render'):
+                body = render_image(result['cells'], height, width, palette_from_color_map(visualizer.color_map),
+                                    scale, image_format)
+            rendered_frames.put(etag, body)
+        
+        response = Response(body, mimetype=MIMETYPES[image_format])
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, max-age=86400, immutable' if recording_key else 'private, no-cache'
+        return response.make_conditional(request)
+        
+    except RecordingUnavailable as e:
+        return jsonify({"error": str(e)}), 409
+    except Exception as e:
+        logger.error(f"Error in frame_image API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/export', methods=['POST'])
+def api_export():
+    """API endpoint to export a whole recording to GIF, APNG or MP4 in the background.
+    
+    Exports the recording named by ``game_id``/``recording_id`` in the body, or
+    the session's recording; returns a job to poll and download when done.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        export_format = str(data.get('format', 'gif')).lower()
+        if export_format not in available_export_formats():
+            return jsonify({"error": f"Unsupported export format: {export_format}; available: {available_export_formats()}"}), 400
+        try:
+            scale = int(data.get('scale', default_export_scale))
+            fps = int(data.get('fps', default_export_fps))
+        except (TypeError, ValueError):
+            return jsonify({"error": "scale and fps must be integers"}), 400
+        if not 1 <= scale <= 16 or not 1 <= fps <= 30:
+            return jsonify({"error": "scale must be between 1 and 16 and fps between 1 and 30"}), 400
+        
+        visualizer = get_visualizer()
+        if data.get('game_id') or data.get('recording_id'):
+            try:
+                game_id, recording_id = parse_recording_ref(data)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            source = {"game_id": game_id, "recording_id": recording_id}
+            recording_key = make_recording_key(f"{game_id}/{recording_id}")
+        elif visualizer.source and visualizer.recording_key:
+            source = dict(visualizer.source)
+            recording_key = visualizer.recording_key
+        else:
+            return jsonify({"error": "No recording to export; load one or pass game_id and recording_id"}), 400
+        
+        job = export_queue.submit(recording_key, source, export_format, palette_from_color_map(visualizer.color_map),
+                                  scale=scale, fps=fps)
+        return jsonify(job.to_dict()), 202
+        
+    except Exception as e:
+        logger.error(f"Error in export API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/export/<job_id>')
+def api_export_status(job_id):
+    """API endpoint reporting the status of an export job"""
+    job = export_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown export job"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/export/<job_id>/download')
+def api_export_download(job_id):
+    """API endpoint serving the file of a finished export job"""
+    job = export_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown export job"}), 404
+    if not job.done:
+        return jsonify(job.to_dict()), 409
+    if job.error or not job.output_path.exists():
+        return jsonify({"error": job.error or "Export is no longer available"}), 410
+    source = job.source
+    name = f"{source['game_id']}-{source['recording_id']}" if 'game_id' in source else Path(source['filepath']).name.split('.')[0]
+    return send_file(job.output_path, mimetype=EXPORT_MIMETYPES[job.format], as_attachment=True,
+                     download_name=f"{name}.{EXPORT_EXTENSIONS[job.format]}", max_age=86400)
+
 @app.route('/api/upload_file', methods=['POST'])
 def api_upload_file():
     """API endpoint to upload and load a recording file"""
@@ -287,20 +1353,23 @@ def api_upload_file():
             return jsonify({"error": "No file selected"}), 400
         
         # Check file extension
-        if not file.filename.lower().endswith(('.jsonl')):
-            return jsonify({"error": "Only .jsonl files are supported"}), 400
-        
-        # Create temporary file
-        import tempfile
-        import shutil
+        filename = file.filename.lower()
+        if not filename.endswith(('.jsonl', '.jsonl.gz', '.jsonl.zst')):
+            return jsonify({"error": "Only .jsonl, .jsonl.gz and .jsonl.zst files are supported"}), 400
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jsonl') as temp_file:
+        # Keep the compression suffix so the file is decompressed while it is parsed
+        suffix = filename[filename.rindex('.jsonl'):]
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
             file.save(temp_file.name)
             temp_path = temp_file.name
         
         try:
             # Load the uploaded file
-            result = visualizer.load_file(temp_path)
+            visualizer = get_visualizer()
+            result = visualizer.load_file(temp_path, use_cache=False)
+            # Uploaded files are removed below, so they cannot be reloaded elsewhere
+            visualizer.source = None
+            session_store.enforce_limits(keep=visualizer.session_id)
             if 'error' not in result:
                 return jsonify(result)
             else:
@@ -326,7 +1395,7 @@ def api_list_recordings():
             return jsonify({"error": "Recordings are not available on this device"}), 403
         else:
             # Get cached recordings from the fetcher
-            cached_recordings = visualizer.recording_fetcher.list_cached_recordings()
+            cached_recordings = recording_fetcher.list_cached_recordings()
             
             # Also look for recordings in the ARC-AGI-3-Agents directory
             recordings_dir = Path(r"C:\Users\smart\Desktop\GD\ARC-AGI-3-Agents\recordings")
@@ -350,6 +1419,8 @@ def api_list_recordings():
             all_recordings = []
             for rec in cached_recordings:
                 rec["source"] = "cached"
+                if rec["has_thumbnail"]:
+                    rec["thumbnail_url"] = f"/api/thumbnail/{rec['game_id']}/{rec['recording_id']}"
                 all_recordings.append(rec)
             
             for rec in local_recordings:
@@ -360,7 +1431,7 @@ def api_list_recordings():
             
             return jsonify({
                 "recordings": all_recordings,
-                "cached_directory": str(visualizer.recording_fetcher.storage_dir),
+                "cached_directory": str(recording_fetcher.storage_dir),
                 "local_directory": str(recordings_dir) if recordings_dir.exists() else None,
                 "total_recordings": len(all_recordings)
             })
@@ -370,15 +1441,111 @@ def api_list_recordings():
         return jsonify({"error": f"Error listing recordings: {str(e)}"}), 500
 
 
+@app.route('/api/search')
+def api_search():
+    """API endpoint searching frames of all cached recordings.
+    
+    Filters: ``q`` (words in the reasoning), ``state``, ``score``, ``min_score``,
+    ``max_score``, ``action`` and ``game_id``. Hits name the recording and the
+    0-based frame for ``/api/go_to_frame``; ``group=recording`` returns one hit
+    per recording with the first matching frame and the number of matches.
+    """
+    try:
+        # Same policy as /api/list_recordings: search reveals which recordings are cached
+        if is_cloud:
+            return jsonify({"error": "Recordings are not available on this device"}), 403
+        args = request.args
+        try:
+            filters = {
+                "score": args.get('score', type=int),
+                "min_score": args.get('min_score', type=int),
+                "max_score": args.get('max_score', type=int),
+                "limit": min(max(int(args.get('limit', 50)), 1), max_search_results),
+                "offset": max(int(args.get('offset', 0)), 0),
+            }
+        except ValueError:
+            return jsonify({"error": "limit and offset must be integers"}), 400
+        text = (args.get('q') or '').strip() or None
+        for name in ('state', 'action', 'game_id'):
+            filters[name] = args.get(name) or None
+        
+        started = time.perf_counter()
+        hits = recording_fetcher.search.search(text=text, by_recording=args.get('group') == 'recording', **filters)
+        return jsonify({
+            "hits": hits,
+            "count": len(hits),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "index": recording_fetcher.search.stats(),
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in search API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+@app.route('/api/thumbnail/<game_id>/<recording_id>')
+def api_thumbnail(game_id, recording_id):
+    """API endpoint returning the final frame of a cached recording as a small PNG"""
+    try:
+        # Same policy as /api/list_recordings: thumbnails reveal which recordings are cached
+        if is_cloud:
+            return jsonify({"error": "Recordings are not available on this device"}), 403
+        if len(game_id) != 17 or len(recording_id) != 36:
+            return jsonify({"error": "Invalid game_id or recording_id"}), 400
+        stored = recording_fetcher.cache.thumbnail(game_id, recording_id)
+        if stored is None:
+            return jsonify({"error": "No thumbnail for this recording"}), 404
+        blob, created = stored
+        etag = f"thumb-{make_recording_key(f'{game_id}/{recording_id}')}-{int(created)}"
+        body = rendered_frames.get(etag)
+        if body is None:
+            height, width, cells = unpack_thumbnail(blob)
+            scale = max(1, thumbnail_pixels // max(height, width, 1))
+            body = render_png(cells, height, width, palette_from_color_map(FrameVisualizer.create_color_map()), scale)
+            rendered_frames.put(etag, body)
+        response = Response(body, mimetype='image/png')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+        return response.make_conditional(request)
+        
+    except Exception as e:
+        logger.error(f"Error in thumbnail API: {str(e)}")
+        return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+
 @app.route('/api/health')
 def api_health():
-    """Health check endpoint"""
-    return jsonify({
+    """Liveness check: answers as soon as the worker runs; ``ready`` tells whether it should take traffic"""
+    startup.ensure_running()
+    health = {
         "status": "healthy",
+        "ready": startup.ready.is_set(),
+        "startup": startup.to_dict(),
         "timestamp": datetime.now().isoformat(),
         "environment": "cloud" if is_cloud else "local",
-        "debug_mode": debug_mode
-    })
+        "debug_mode": debug_mode,
+        "streaming": streaming_enabled(),
+    }
+    if startup.initialized.is_set() and not startup.error:
+        health.update({
+            "sessions": session_store.stats(),
+            "parsed_cache": recording_cache.stats(),
+            "disk_cache": recording_fetcher.cache.stats(),
+            "rendered_frames": rendered_frames.stats(),
+            "exports": export_queue.stats(),
+            "active_streams": active_streams,
+        })
+    return jsonify(health)
+
+@app.route('/api/health/ready')
+def api_health_ready():
+    """Readiness check: 503 until the components are built and warm-up finished or timed out"""
+    startup.ensure_running()
+    return jsonify(startup.to_dict()), 200 if startup.ready.is_set() else 503
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics of this worker process"""
+    return Response(registry.render(), content_type=registry.CONTENT_TYPE)
 
 @app.errorhandler(404)
 def not_found(error):
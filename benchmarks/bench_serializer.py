@@ -0,0 +1,82 @@
+"""Compare the JSON backends of serializer.py on recordings.
+
+Usage:
+    python benchmarks/bench_serializer.py recordings_cache/*.jsonl
+    python benchmarks/bench_serializer.py --synthetic 2000
+
+Reports, per backend, the time to decode every frame line and to encode frame
+payloads (what jsonify does), with the speedup over the standard library.
+"""
+import os
+import sys
+import time
+import argparse
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from serializer import Serializer, available_backends  # noqa: E402
+from recordings import recording_bytes  # noqa: E402
+
+
+def synthetic_lines(frames: int) -> List[bytes]:
+    return recording_bytes(frames, grid_size=64, reasoning_chars=800).splitlines()
+
+
+def read_lines(paths: List[str]) -> List[bytes]:
+    lines = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            lines.extend(line for line in f.read().split(b'\n') if line.strip())
+    return lines
+
+
+def best_time(fn: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(lines: List[bytes], repeat: int = 3) -> Dict[str, Dict[str, float]]:
+    results = {}
+    reference = Serializer('json')
+    payloads = [reference.loads(line)['data'] for line in lines]
+    for backend in available_backends() + ['auto']:
+        s = Serializer(backend)
+        results[backend] = {
+            "decode": best_time(lambda: [s.loads(line) for line in lines], repeat),
+            "encode": best_time(lambda: [s.dumps(payload) for payload in payloads], repeat),
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('recordings', nargs='*', help="JSONL recordings to benchmark")
+    parser.add_argument('--synthetic', type=int, default=0, help="generate this many frames instead")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.recordings:
+        lines = read_lines(args.recordings)
+    else:
+        lines = synthetic_lines(args.synthetic or 1000)
+    total_mb = sum(len(line) for line in lines) / 1e6
+    print(f"{len(lines)} frames, {total_mb:.1f} MB; backends: {', '.join(available_backends())}")
+
+    results = run(lines, args.repeat)
+    baseline = results['json']
+    print(f"{'backend':<10}{'operation':<14}{'seconds':>10}{'MB/s':>10}{'speedup':>10}")
+    for backend, timings in results.items():
+        for operation, seconds in timings.items():
+            print(f"{backend:<10}{operation:<14}{seconds:>10.3f}{total_mb / seconds:>10.1f}"
+                  f"{baseline[operation] / seconds:>9.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Synthetic recordings shaped like the ones served by the recordings API."""
+import json
+import random
+from typing import Dict, Iterator
+
+GAME_ID = "ft09-16726c5b26ff"
+
+
+def recording_id(n: int) -> str:
+    """Deterministic 36-character recording id"""
+    return f"00000000-0000-4000-8000-{n:012d}"
+
+
+def synthetic_frames(frames: int, grid_size: int = 64, reasoning_chars: int = 800, layers: int = 1,
+                     changes_per_frame: int = 8, seed: int = 0) -> Iterator[Dict]:
+    """Frames whose grid changes a few cells per step, like a game being played"""
+    rng = random.Random(seed)
+    grid = [[rng.randrange(16) for _ in range(grid_size)] for _ in range(grid_size)]
+    words = "the agent moves toward the target and checks the result of the previous action".split()
+    for i in range(frames):
+        grid = [row[:] for row in grid]
+        for _ in range(changes_per_frame):
+            grid[rng.randrange(grid_size)][rng.randrange(grid_size)] = rng.randrange(16)
+        text = []
+        while sum(len(w) + 1 for w in text) < reasoning_chars:
+            text.append(rng.choice(words))
+        action = 1 + i % 6
+        yield {
+            "timestamp": f"2025-07-18T12:{i // 3600 % 60:02d}:{i % 60:02d}.000000+00:00",
+            "data": {
+                "game_id": GAME_ID,
+                "state": "GAME_OVER" if i == frames - 1 else "NOT_FINISHED",
+                "score": i // 50,
+                "frame": [grid] * layers,
+                "full_reset": False,
+                "action_input": {
+                    "id": action,
+                    "data": {"game_id": GAME_ID, "x": rng.randrange(grid_size), "y": rng.randrange(grid_size)},
+                    "reasoning": {"action_chosen": f"ACTION{action}", "agent_type": "llm", "model": "model",
+                                  "text": ' '.join(text)},
+                },
+            },
+        }
+
+
+def recording_bytes(frames: int, **kwargs) -> bytes:
+    return b''.join(json.dumps(frame).encode('utf-8') + b'\n' for frame in synthetic_frames(frames, **kwargs))
+
+
+def write_recording(path: str, frames: int, **kwargs) -> int:
+    """Write a synthetic JSONL recording, returning its size in bytes"""
+    body = recording_bytes(frames, **kwargs)
+    with open(path, 'wb') as f:
+        f.write(body)
+    return len(body)
@@ -0,0 +1,328 @@
+"""Reproducible benchmarks of the load, navigation and playback hot paths.
+
+Usage:
+    python benchmarks/run_benchmarks.py --profile small --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json      # exit 1 on regressions
+
+Each profile generates a synthetic recording (frame count, grid size, reasoning
+size) and times:
+  fetch        RecordingFetcher.download_recording against a local stub server
+  save         RecordingFetcher.save_recording
+  load         FrameVisualizer.load_file with and without sidecar index/grid store
+  navigate     FrameVisualizer.go_to_frame, sequential and random
+  endpoints    go_to_frame / frame_delta / frames over HTTP with concurrent clients
+
+Results are flat ``profile.scenario.metric`` keys. Metrics ending in ``_s`` or
+``_ms`` are better when lower; ``_per_s`` metrics are better when higher.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import threading
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from recordings import GAME_ID, recording_bytes, recording_id, synthetic_frames  # noqa: E402
+from stub_server import StubRecordingServer  # noqa: E402
+
+PROFILES = {
+    'small': {"frames": 200, "grid_size": 32, "reasoning_chars": 400},
+    'medium': {"frames": 1000, "grid_size": 64, "reasoning_chars": 800},
+    'large': {"frames": 5000, "grid_size": 64, "reasoning_chars": 2000},
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def latency_metrics(prefix: str, samples: List[float]) -> Dict[str, float]:
+    return {
+        f"{prefix}_p50_ms": percentile(samples, 50) * 1000,
+        f"{prefix}_p95_ms": percentile(samples, 95) * 1000,
+        f"{prefix}_p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def timed(fn: Callable[[], object], repeat: int = 3) -> float:
+    """Median wall time of ``repeat`` runs"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def remove_sidecars(fetcher, path: str) -> None:
+    for sidecar in (fetcher.get_index_path(path), fetcher.get_grid_path(path)):
+        try:
+            os.unlink(sidecar)
+        except FileNotFoundError:
+            pass
+
+
+def bench_fetch(app, stub: StubRecordingServer, workdir: str, body: bytes, repeat: int) -> Dict[str, float]:
+    storage = os.path.join(workdir, 'fetch_cache')
+    fetcher = app.RecordingFetcher(storage_dir=storage, base_url=stub.base_url)
+    ids = iter(range(1, 1000))
+
+    def fetch_new():
+        n = next(ids)
+        stub.recordings[(GAME_ID, recording_id(n))] = body
+        assert fetcher.download_recording(GAME_ID, recording_id(n))
+
+    seconds = timed(fetch_new, repeat)
+    shutil.rmtree(storage, ignore_errors=True)
+    return {"download_s": seconds, "download_mb_per_s": len(body) / 1e6 / seconds}
+
+
+def bench_save(app, workdir: str, frames: List[Dict], repeat: int) -> Dict[str, float]:
+    storage = os.path.join(workdir, 'save_cache')
+    fetcher = app.RecordingFetcher(storage_dir=storage)
+    seconds = timed(lambda: fetcher.save_recording(GAME_ID, recording_id(0), frames), repeat)
+    shutil.rmtree(storage, ignore_errors=True)
+    return {"save_s": seconds}
+
+
+def bench_load(app, workdir: str, path: str, repeat: int) -> Dict[str, float]:
+    fetcher = app.RecordingFetcher(storage_dir=os.path.join(workdir, 'load_cache'))
+
+    def load(cold: bool):
+        if cold:
+            remove_sidecars(fetcher, path)
+        # A fresh parsed-recording cache per run, as in a newly started worker
+        visualizer = app.FrameVisualizer(recording_fetcher=fetcher, recording_cache=app.ParsedRecordingCache())
+        result = visualizer.load_file(path)
+        assert 'error' not in result, result
+
+    cold = timed(lambda: load(True), repeat)
+    warm = timed(lambda: load(False), repeat)
+    eager = timed(lambda: app.parse_recording_file(path), repeat)
+    return {"cold_index_s": cold, "warm_index_s": warm, "eager_parse_s": eager}
+
+
+def bench_navigate(app, workdir: str, path: str, samples: int) -> Dict[str, float]:
+    fetcher = app.RecordingFetcher(storage_dir=os.path.join(workdir, 'load_cache'))
+    visualizer = app.FrameVisualizer(recording_fetcher=fetcher, recording_cache=app.ParsedRecordingCache())
+    visualizer.load_file(path)
+    total = len(visualizer.frames)
+    rng = random.Random(1)
+
+    def measure(indices):
+        latencies = []
+        for index in indices:
+            start = time.perf_counter()
+            visualizer.go_to_frame(index)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    metrics = {}
+    metrics.update(latency_metrics("sequential", measure([i % total for i in range(samples)])))
+    metrics.update(latency_metrics("random", measure([rng.randrange(total) for _ in range(samples)])))
+    return metrics
+
+
+def bench_endpoints(app, stub: StubRecordingServer, body: bytes, clients: int, requests_per_client: int,
+                    total_frames: int) -> Dict[str, float]:
+    import requests
+    from werkzeug.serving import make_server
+
+    rec = recording_id(999)
+    stub.recordings[(GAME_ID, rec)] = body
+    app.recording_fetcher.base_url = stub.base_url
+    server = make_server('127.0.0.1', 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    latencies: Dict[str, List[float]] = {"go_to_frame": [], "frame_delta": [], "frames": [], "load": []}
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(clients)
+
+    def client(seed: int):
+        rng = random.Random(seed)
+        session = requests.Session()
+        local = {name: [] for name in latencies}
+        try:
+            start_barrier.wait()
+            started = time.perf_counter()
+            response = session.post(f"{base}/api/load_recording", json={"game_id": GAME_ID, "recording_id": rec})
+            local["load"].append(time.perf_counter() - started)
+            response.raise_for_status()
+            query = f"game_id={GAME_ID}&recording_id={rec}"
+            for n in range(requests_per_client):
+                kind = ("go_to_frame", "frame_delta", "frames")[n % 3]
+                index = rng.randrange(total_frames - 1)
+                if kind == "go_to_frame":
+                    url = f"{base}/api/go_to_frame/{index}?lean=1&{query}"
+                elif kind == "frame_delta":
+                    url = f"{base}/api/frame_delta/{index}/{index + 1}?lean=1&{query}"
+                else:
+                    url = f"{base}/api/frames?start={index}&end={index + 20}&encoding=delta&{query}"
+                started = time.perf_counter()
+                response = session.get(url, headers={"Accept-Encoding": "gzip"})
+                local[kind].append(time.perf_counter() - started)
+                response.raise_for_status()
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+        with lock:
+            for name, values in local.items():
+                latencies[name].extend(values)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(clients)]
+    wall_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_start
+    server.shutdown()
+
+    if errors:
+        raise RuntimeError(f"{len(errors)} endpoint clients failed: {errors[0]}")
+    metrics = {
+        "requests_per_s": sum(len(v) for v in latencies.values()) / wall,
+        "upstream_fetches": float(stub.hits.get(f"/{GAME_ID}/{rec}", 0)),
+    }
+    for name, values in latencies.items():
+        metrics.update(latency_metrics(name, values))
+    return metrics
+
+
+def run_profile(app, name: str, settings: Dict, workdir: str, args) -> Dict[str, float]:
+    frame_count = settings["frames"]
+    generator_args = {k: v for k, v in settings.items() if k != "frames"}
+    body = recording_bytes(frame_count, **generator_args)
+    frames = list(synthetic_frames(frame_count, **generator_args))
+    path = os.path.join(workdir, f"{name}.jsonl")
+    with open(path, 'wb') as f:
+        f.write(body)
+
+    results = {"recording.mb": len(body) / 1e6}
+    with StubRecordingServer({}) as stub:
+        scenarios = {
+            "fetch": lambda: bench_fetch(app, stub, workdir, body, args.repeat),
+            "save": lambda: bench_save(app, workdir, frames, args.repeat),
+            "load": lambda: bench_load(app, workdir, path, args.repeat),
+            "navigate": lambda: bench_navigate(app, workdir, path, args.samples),
+            "endpoints": lambda: bench_endpoints(app, stub, body, args.clients, args.requests, frame_count),
+        }
+        for scenario, run in scenarios.items():
+            if args.only and scenario not in args.only:
+                continue
+            print(f"  {name}.{scenario} ...", flush=True)
+            for metric, value in run().items():
+                results[f"{scenario}.{metric}"] = round(value, 6)
+    return results
+
+
+def environment() -> Dict:
+    import serializer
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "json_decode": serializer.serializer.decode_backend,
+        "json_encode": serializer.serializer.encode_backend,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def lower_is_better(metric: str) -> bool:
+    return metric.endswith(('_s', '_ms')) and not metric.endswith('_per_s')
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Metrics that got worse than ``baseline`` by more than ``threshold`` (a fraction)"""
+    regressions = []
+    print(f"{'metric':<50}{'baseline':>12}{'current':>12}{'better':>10}")
+    for key, value in results["results"].items():
+        old = baseline.get("results", {}).get(key)
+        if old is None or not old or not (lower_is_better(key) or key.endswith('_per_s')):
+            continue
+        change = (value - old) / old if lower_is_better(key) else (old - value) / old
+        marker = "REGRESSION" if change > threshold else ""
+        print(f"{key:<50}{old:>12.4f}{value:>12.4f}{-change * 100:>+9.1f}% {marker}")
+        if marker:
+            regressions.append(key)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--profile', action='append', choices=sorted(PROFILES),
+                        help="profiles to run (default: small and medium)")
+    parser.add_argument('--only', action='append', help="run only these scenarios")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per timed operation (median is kept)")
+    parser.add_argument('--samples', type=int, default=500, help="go_to_frame calls per navigation pattern")
+    parser.add_argument('--clients', type=int, default=8, help="concurrent HTTP clients")
+    parser.add_argument('--requests', type=int, default=60, help="requests per HTTP client")
+    parser.add_argument('--output', help="write results as JSON to this file")
+    parser.add_argument('--compare', help="baseline results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    workdir = tempfile.mkdtemp(prefix='replay-bench-')
+    # app creates its caches relative to the working directory at import time
+    os.chdir(workdir)
+    os.environ.setdefault('IS_CLOUD', '1')
+    import logging
+    logging.disable(logging.WARNING)
+    import app
+
+    results = {"environment": environment(), "settings": {}, "results": {}}
+    try:
+        for name in args.profile or ['small', 'medium']:
+            print(f"Profile {name}: {PROFILES[name]}", flush=True)
+            results["settings"][name] = PROFILES[name]
+            for metric, value in run_profile(app, name, PROFILES[name], workdir, args).items():
+                results["results"][f"{name}.{metric}"] = value
+    finally:
+        os.chdir(ROOT)
+        logging.disable(logging.NOTSET)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Wrote {output}")
+    else:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metrics regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
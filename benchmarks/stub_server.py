@@ -0,0 +1,73 @@
+"""Local stand-in for the recordings API, serving in-memory recordings over HTTP."""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+
+
+class StubRecordingServer:
+    """Serves ``/<game_id>/<recording_id>`` from ``recordings`` in fixed-size chunks.
+
+    ``chunk_delay`` sleeps between chunks to emulate a slow link. Requests are
+    counted per path so benchmarks can check how many upstream fetches happened.
+    """
+
+    def __init__(self, recordings: Dict[Tuple[str, str], bytes], chunk_size: int = 64 * 1024,
+                 chunk_delay: float = 0.0):
+        self.recordings = recordings
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.hits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.hits[self.path] = stub.hits.get(self.path, 0) + 1
+                parts = self.path.strip('/').split('/')
+                body = stub.recordings.get(tuple(parts)) if len(parts) == 2 else None
+                if body is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                for start in range(0, len(body), stub.chunk_size):
+                    self.wfile.write(body[start:start + stub.chunk_size])
+                    if stub.chunk_delay:
+                        self.wfile.flush()
+                        threading.Event().wait(stub.chunk_delay)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'StubRecordingServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
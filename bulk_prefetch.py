@@ -0,0 +1,192 @@
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from recording_fetcher import RecordingFetcher
+
+logger = logging.getLogger(__name__)
+
+# Item states, in the order an item moves through them
+PENDING = "pending"
+DOWNLOADING = "downloading"
+CACHED = "cached"
+DOWNLOADED = "downloaded"
+FAILED = "failed"
+
+
+def parse_recording_ref(ref) -> Tuple[str, str]:
+    """Accept ``"game_id/recording_id"`` or ``{"game_id": ..., "recording_id": ...}``"""
+    if isinstance(ref, dict):
+        game_id, recording_id = ref.get('game_id'), ref.get('recording_id')
+    elif isinstance(ref, str) and ref.count('/') == 1:
+        game_id, recording_id = ref.strip().split('/')
+    else:
+        raise ValueError(f"Invalid recording reference: {ref!r}")
+    if not isinstance(game_id, str) or not isinstance(recording_id, str) \
+            or len(game_id) != 17 or len(recording_id) != 36:
+        raise ValueError(f"Invalid game_id or recording_id: {ref!r}")
+    return game_id, recording_id
+
+
+class PrefetchItem:
+    """Status of one recording in a bulk prefetch"""
+
+    def __init__(self, game_id: str, recording_id: str):
+        self.game_id = game_id
+        self.recording_id = recording_id
+        self.status = PENDING
+        self.path = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self, fetcher: Optional[RecordingFetcher] = None) -> Dict:
+        result = {
+            "game_id": self.game_id,
+            "recording_id": self.recording_id,
+            "status": self.status,
+            "path": self.path,
+            "error": self.error,
+            "elapsed": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None,
+        }
+        if self.status == DOWNLOADING and fetcher is not None:
+            result["progress"] = fetcher.get_progress(self.game_id, self.recording_id)
+        return result
+
+
+class PrefetchJob:
+    """Download many recordings into the cache with bounded parallelism.
+
+    Duplicate references are fetched once, recordings already cached are skipped,
+    and a recording that another request is already downloading is waited on
+    rather than fetched again (see ``RecordingFetcher.download_recording``).
+    """
+
+    def __init__(self, fetcher: RecordingFetcher, refs: Iterable, max_workers: int = 4):
+        self.job_id = uuid.uuid4().hex
+        self.fetcher = fetcher
+        self.max_workers = max(1, max_workers)
+        self.items: List[PrefetchItem] = []
+        seen = set()
+        for ref in refs:
+            key = parse_recording_ref(ref)
+            if key not in seen:
+                seen.add(key)
+                self.items.append(PrefetchItem(*key))
+        self.done = False
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self) -> 'PrefetchJob':
+        """Run the job in a background thread"""
+        threading.Thread(target=self.run, daemon=True, name=f"prefetch-{self.job_id[:8]}").start()
+        return self
+
+    def run(self) -> 'PrefetchJob':
+        self.started_at = time.time()
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='prefetch') as pool:
+                list(pool.map(self._fetch_item, self.items))
+        finally:
+            self.done = True
+            self.finished_at = time.time()
+        logger.info(f"Prefetch {self.job_id} finished: {self.counts()}")
+        return self
+
+    def _fetch_item(self, item: PrefetchItem) -> None:
+        item.started_at = time.time()
+        try:
+            cached_path = self.fetcher.get_cached_recording(item.game_id, item.recording_id)
+            if cached_path:
+                item.path, item.status = cached_path, CACHED
+                return
+            item.status = DOWNLOADING
+            item.path = self.fetcher.download_recording(item.game_id, item.recording_id)
+            if item.path:
+                item.status = DOWNLOADED
+            else:
+                progress = self.fetcher.get_progress(item.game_id, item.recording_id) or {}
+                item.error = progress.get('error') or "Download failed"
+                item.status = FAILED
+        except Exception as e:
+            logger.error(f"Error prefetching {item.game_id}/{item.recording_id}: {e}")
+            item.error = str(e)
+            item.status = FAILED
+        finally:
+            item.finished_at = time.time()
+
+    def counts(self) -> Dict[str, int]:
+        counts = {status: 0 for status in (PENDING, DOWNLOADING, CACHED, DOWNLOADED, FAILED)}
+        for item in self.items:
+            counts[item.status] += 1
+        return counts
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "done": self.done,
+            "total": len(self.items),
+            "counts": self.counts(),
+            "elapsed": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None,
+            "items": [item.to_dict(self.fetcher) for item in self.items],
+        }
+
+
+def read_refs(lines: Iterable[str]) -> List[str]:
+    """Recording references from a list file, one per line; blank lines and # comments are skipped"""
+    refs = []
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if line:
+            refs.append(line)
+    return refs
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prefetch many recordings into the local cache")
+    parser.add_argument('recordings', nargs='*', help="game_id/recording_id pairs")
+    parser.add_argument('-f', '--file', help="file with one game_id/recording_id per line ('-' for stdin)")
+    parser.add_argument('-w', '--workers', type=int, default=4, help="concurrent downloads (default: 4)")
+    parser.add_argument('--storage-dir', default="recordings_cache", help="cache directory")
+    parser.add_argument('--base-url', default=None, help="recordings API base URL")
+    parser.add_argument('--json', action='store_true', help="print the job result as JSON")
+    args = parser.parse_args(argv)
+
+    refs = list(args.recordings)
+    if args.file:
+        if args.file == '-':
+            refs.extend(read_refs(sys.stdin))
+        else:
+            with open(args.file) as f:
+                refs.extend(read_refs(f))
+    if not refs:
+        parser.error("no recordings given")
+
+    fetcher_kwargs = {"storage_dir": args.storage_dir, "pool_size": max(args.workers, 1)}
+    if args.base_url:
+        fetcher_kwargs["base_url"] = args.base_url
+    try:
+        job = PrefetchJob(RecordingFetcher(**fetcher_kwargs), refs, max_workers=args.workers)
+    except ValueError as e:
+        parser.error(str(e))
+    job.run()
+
+    result = job.to_dict()
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for item in result["items"]:
+            detail = item["error"] if item["status"] == FAILED else item["path"]
+            print(f"{item['status']:<10} {item['game_id']}/{item['recording_id']} {detail}")
+        print(f"{result['counts']} in {result['elapsed']}s")
+    return 1 if result["counts"][FAILED] else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
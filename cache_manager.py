@@ -0,0 +1,427 @@
+import os
+import time
+import sqlite3
+import logging
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
+from compression import CODEC_SUFFIXES, compress_file, decompress_file
+from serializer import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.sqlite3"
+# Sidecars written next to each cached recording (frame index and packed grids)
+SIDECAR_SUFFIXES = ('.idx', '.grids')
+COMPRESSED_SUFFIXES = tuple(CODEC_SUFFIXES.values())
+# last_access is only rewritten when it is older than this, so reads rarely write
+TOUCH_INTERVAL = 60
+# Touch times older than TOUCH_INTERVAL are dropped once this many keys are remembered
+TOUCHED_MAX_KEYS = 1024
+# stats() reuses its scan of the working files for this long
+SCRATCH_STATS_SECONDS = 30
+# Working files under storage_dir that count toward max_bytes: plain copies of compressed
+# recordings opened from elsewhere, and sidecars of recordings outside the cache
+SCRATCH_DIRS = ('decompressed', 'index')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    name TEXT PRIMARY KEY,
+    game_id TEXT NOT NULL,
+    recording_id TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    frames INTEGER,
+    modified REAL NOT NULL,
+    last_access REAL NOT NULL,
+    compressed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS recordings_last_access ON recordings (last_access);
+CREATE INDEX IF NOT EXISTS recordings_modified ON recordings (modified);
+CREATE TABLE IF NOT EXISTS summaries (
+    name TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    thumbnail BLOB,
+    created REAL NOT NULL
+);
+"""
+
+
+def recording_filename(game_id: str, recording_id: str) -> str:
+    return f"{game_id}-{recording_id}.jsonl"
+
+
+def split_filename(name: str) -> Tuple[str, str]:
+    """(game_id, recording_id) of a cache file name; recording ids are 36-character UUIDs"""
+    stem = name[:-len('.jsonl')] if name.endswith('.jsonl') else name
+    if len(stem) > 37 and stem[-37] == '-':
+        return stem[:-37], stem[-36:]
+    game_id, _, recording_id = stem.partition('-')
+    return game_id, recording_id
+
+
+class RecordingCacheManager:
+    """Persistent manifest and size limits for the on-disk recording cache.
+
+    Every cached recording has a row in a SQLite manifest in ``storage_dir`` with
+    its size on disk (including sidecars), frame count and last access time, so
+    listing and eviction are queries instead of directory scans. Recordings not
+    accessed for ``compress_after`` seconds are compressed with ``codec`` (``gzip``
+    or ``zstd``) and transparently restored on the next access; least recently
+    used recordings are deleted once the cache exceeds ``max_bytes`` or
+    ``max_entries`` (0 disables a limit); working files in ``SCRATCH_DIRS`` count
+    toward ``max_bytes`` and are deleted first. Recordings and working files
+    accessed in the last ``protect_seconds`` are never evicted or compressed,
+    since sessions may still be reading them.
+
+    ``lock_for(game_id, recording_id, blocking)`` returns the cross-process lock
+    of a recording; eviction and compression skip recordings that are locked.
+    ``on_forget(name)`` is called when a recording is removed or rewritten, so
+    indexes kept elsewhere can drop it.
+    """
+
+    def __init__(self, storage_dir, lock_for: Callable[..., ContextManager], max_bytes: int = 0,
+                 max_entries: int = 0, compress_after: float = 0, protect_seconds: float = 300,
+                 codec: str = 'gzip', on_forget: Optional[Callable[[str], None]] = None):
+        self.storage_dir = Path(storage_dir)
+        self.on_forget = on_forget
+        self.codec = codec
+        self.lock_for = lock_for
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.compress_after = compress_after
+        self.protect_seconds = protect_seconds
+        self.manifest_path = self.storage_dir / MANIFEST_NAME
+        # When each recording (or working file) was last touched by this process
+        self._touched: Dict[str, float] = {}
+        # Total size of the working files and when it was measured (see stats)
+        self._scratch_bytes: Optional[Tuple[int, float]] = None
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self.sync()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.manifest_path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _disk_size(self, path: Path) -> int:
+        size = 0
+        for suffix in ('',) + COMPRESSED_SUFFIXES + SIDECAR_SUFFIXES:
+            candidate = Path(str(path) + suffix)
+            try:
+                size += candidate.stat().st_size
+            except OSError:
+                pass
+        return size
+
+    def sync(self) -> None:
+        """Reconcile the manifest with the directory (files added or removed behind its back)"""
+        on_disk = {}
+        for suffix in ('',) + COMPRESSED_SUFFIXES:
+            for path in self.storage_dir.glob('*.jsonl' + suffix):
+                on_disk.setdefault(path.name[:len(path.name) - len(suffix)], path)
+
+        with self._connect() as conn:
+            known = {row['name'] for row in conn.execute("SELECT name FROM recordings")}
+            for name in known - set(on_disk):
+                conn.execute("DELETE FROM recordings WHERE name = ?", (name,))
+                conn.execute("DELETE FROM summaries WHERE name = ?", (name,))
+        for name in known - set(on_disk):
+            self._forget(name)
+        with self._connect() as conn:
+            for name in set(on_disk) - known:
+                path = on_disk[name]
+                stat = path.stat()
+                game_id, recording_id = split_filename(name)
+                conn.execute(
+                    "INSERT OR IGNORE INTO recordings (name, game_id, recording_id, size, frames, modified, "
+                    "last_access, compressed) VALUES (?, ?, ?, ?, NULL, ?, ?, ?)",
+                    (name, game_id, recording_id, self._disk_size(self.storage_dir / name), stat.st_mtime,
+                     stat.st_mtime, int(path.name.endswith(COMPRESSED_SUFFIXES))))
+        if known != set(on_disk):
+            logger.info(f"Synced cache manifest: {len(on_disk)} recordings on disk")
+
+    def record(self, game_id: str, recording_id: str, frames: Optional[int] = None) -> None:
+        """Add or refresh the manifest row of a recording that was just written"""
+        name = recording_filename(game_id, recording_id)
+        path = self.storage_dir / name
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO recordings (name, game_id, recording_id, size, frames, modified, "
+                "last_access, compressed) VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                (name, game_id, recording_id, self._disk_size(path), frames, path.stat().st_mtime, now))
+            # The file was (re)written, so any earlier summary describes other content
+            conn.execute("DELETE FROM summaries WHERE name = ?", (name,))
+        self._forget(name)
+
+    def _should_touch(self, key: str, now: float) -> bool:
+        if now - self._touched.get(key, 0) < TOUCH_INTERVAL:
+            return False
+        self._touched[key] = now
+        if len(self._touched) > TOUCHED_MAX_KEYS:
+            # Entries past TOUCH_INTERVAL no longer suppress a write, so they can go
+            for stale, touched in list(self._touched.items()):
+                if now - touched >= TOUCH_INTERVAL:
+                    self._touched.pop(stale, None)
+        return True
+
+    def touch(self, game_id: str, recording_id: str) -> None:
+        """Mark a recording as in use; cheap enough to call on every frame read"""
+        name = recording_filename(game_id, recording_id)
+        now = time.time()
+        if not self._should_touch(name, now):
+            return
+        with self._connect() as conn:
+            conn.execute("UPDATE recordings SET last_access = ? WHERE name = ? AND last_access < ?",
+                         (now, name, now - TOUCH_INTERVAL))
+
+    def touch_file(self, filepath: str) -> None:
+        """Mark a working file in SCRATCH_DIRS as in use by setting its access time (mtime is kept)"""
+        path = Path(filepath)
+        if path.parent.name not in SCRATCH_DIRS or path.parent.parent.resolve() != self.storage_dir.resolve():
+            return
+        now = time.time()
+        if not self._should_touch(str(path), now):
+            return
+        try:
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        except OSError:
+            pass
+
+    def _scratch_files(self) -> List[Tuple[float, int, Path]]:
+        """(last access, size, path) of the working files, least recently used first"""
+        files = []
+        for dirname in SCRATCH_DIRS:
+            directory = self.storage_dir / dirname
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+        return sorted(files)
+
+    def entries(self) -> List[Dict]:
+        """All cached recordings with their summary (or None), newest first"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT r.*, s.summary, s.thumbnail IS NOT NULL AS has_thumbnail "
+                                "FROM recordings r LEFT JOIN summaries s ON s.name = r.name "
+                                "ORDER BY r.modified DESC").fetchall()
+        entries = []
+        for row in rows:
+            entry = dict(row)
+            entry['summary'] = loads(entry['summary']) if entry['summary'] else None
+            entries.append(entry)
+        return entries
+
+    def set_summary(self, game_id: str, recording_id: str, summary: Dict, thumbnail: Optional[bytes]) -> None:
+        """Store the summary and thumbnail blob of a cached recording"""
+        name = recording_filename(game_id, recording_id)
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO summaries (name, summary, thumbnail, created) "
+                         "SELECT name, ?, ?, ? FROM recordings WHERE name = ?",
+                         (dumps(summary).decode('utf-8'), thumbnail, time.time(), name))
+            conn.execute("UPDATE recordings SET frames = COALESCE(frames, ?) WHERE name = ?",
+                         (summary.get('frames'), name))
+
+    def thumbnail(self, game_id: str, recording_id: str) -> Optional[Tuple[bytes, float]]:
+        """Thumbnail blob of a recording and when it was computed"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT thumbnail, created FROM summaries WHERE name = ?",
+                               (recording_filename(game_id, recording_id),)).fetchone()
+        return (row['thumbnail'], row['created']) if row and row['thumbnail'] else None
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS total_bytes, "
+                               "COALESCE(SUM(compressed), 0) AS compressed FROM recordings").fetchone()
+        now = time.monotonic()
+        if self._scratch_bytes is None or now - self._scratch_bytes[1] > SCRATCH_STATS_SECONDS:
+            # Health checks and metric scrapes call this often; walking the directories each time is wasted work
+            self._scratch_bytes = (sum(size for _, size, _ in self._scratch_files()), now)
+        scratch_bytes = self._scratch_bytes[0]
+        return {
+            "entries": row['entries'],
+            "compressed": row['compressed'],
+            "total_bytes": row['total_bytes'] + scratch_bytes,
+            "scratch_bytes": scratch_bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+        }
+
+    def compressed_path(self, game_id: str, recording_id: str) -> Optional[Path]:
+        """Compressed file of a recording that is stored compressed, if any"""
+        path = self.storage_dir / recording_filename(game_id, recording_id)
+        if path.exists():
+            return None
+        for suffix in COMPRESSED_SUFFIXES:
+            candidate = Path(str(path) + suffix)
+            if candidate.exists():
+                return candidate
+        return None
+
+    def is_compressed(self, game_id: str, recording_id: str) -> bool:
+        return self.compressed_path(game_id, recording_id) is not None
+
+    def compress(self, game_id: str, recording_id: str) -> bool:
+        """Compress a cold recording in place; caller holds the recording's lock"""
+        name = recording_filename(game_id, recording_id)
+        path = self.storage_dir / name
+        compressed_path = Path(str(path) + CODEC_SUFFIXES[self.codec])
+        temp_path = Path(str(compressed_path) + '.tmp')
+        try:
+            stat = path.stat()
+            compress_file(str(path), str(temp_path), self.codec)
+            # Keep the original mtime so the sidecar index and grid store stay valid after restoring
+            os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(temp_path, compressed_path)
+            os.unlink(path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not compress cached recording {name}: {e}")
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return False
+
+        with self._connect() as conn:
+            conn.execute("UPDATE recordings SET compressed = 1, size = ? WHERE name = ?",
+                         (self._disk_size(path), name))
+        logger.info(f"Compressed cold recording {name}")
+        return True
+
+    def decompress(self, game_id: str, recording_id: str) -> Optional[str]:
+        """Restore a compressed recording; caller holds the recording's lock"""
+        name = recording_filename(game_id, recording_id)
+        path = self.storage_dir / name
+        compressed_path = self.compressed_path(game_id, recording_id)
+        if compressed_path is None:
+            return str(path) if path.exists() else None
+        temp_path = Path(str(path) + '.restore')
+        try:
+            stat = compressed_path.stat()
+            decompress_file(str(compressed_path), str(temp_path))
+            os.utime(temp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(temp_path, path)
+            os.unlink(compressed_path)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not restore cached recording {name}: {e}")
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return None
+
+        with self._connect() as conn:
+            conn.execute("UPDATE recordings SET compressed = 0, size = ?, last_access = ? WHERE name = ?",
+                         (self._disk_size(path), time.time(), name))
+        logger.info(f"Restored compressed recording {name}")
+        return str(path)
+
+    def remove(self, game_id: str, recording_id: str) -> bool:
+        """Delete a recording and its sidecars; caller holds the recording's lock.
+
+        Returns False, keeping the manifest row so a later call retries, when a file
+        cannot be deleted (on Windows a memory-mapped grid store cannot be unlinked).
+        Sidecars go first so a failure never leaves them without their recording.
+        """
+        name = recording_filename(game_id, recording_id)
+        path = str(self.storage_dir / name)
+        for candidate in tuple(path + suffix for suffix in SIDECAR_SUFFIXES + COMPRESSED_SUFFIXES) + (path,):
+            try:
+                os.unlink(candidate)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove {candidate}, will retry later: {e}")
+                return False
+        with self._connect() as conn:
+            conn.execute("DELETE FROM recordings WHERE name = ?", (name,))
+            conn.execute("DELETE FROM summaries WHERE name = ?", (name,))
+        self._forget(name)
+        return True
+
+    def _forget(self, name: str) -> None:
+        self._touched.pop(name, None)
+        if self.on_forget is not None:
+            try:
+                self.on_forget(name)
+            except Exception as e:
+                logger.warning(f"Could not drop {name} from indexes: {e}")
+
+    def enforce_limits(self, keep: Optional[str] = None) -> Dict[str, int]:
+        """Compress cold recordings and evict least recently used ones (and working files) over the limits"""
+        now = time.time()
+        compressed = evicted = scratch_removed = 0
+
+        if self.compress_after > 0:
+            # Sessions read recordings by byte offset, so ones still in use must stay uncompressed
+            cold_before = now - max(self.compress_after, self.protect_seconds)
+            with self._connect() as conn:
+                cold = conn.execute("SELECT game_id, recording_id, name FROM recordings WHERE compressed = 0 "
+                                    "AND last_access < ? ORDER BY last_access", (cold_before,)).fetchall()
+            for row in cold:
+                if row['name'] != keep and self._with_lock(row, self.compress):
+                    compressed += 1
+
+        if self.max_bytes > 0 or self.max_entries > 0:
+            with self._connect() as conn:
+                totals = conn.execute("SELECT COUNT(*) AS entries, COALESCE(SUM(size), 0) AS total_bytes "
+                                      "FROM recordings").fetchone()
+                candidates = conn.execute("SELECT game_id, recording_id, name, size FROM recordings "
+                                          "WHERE last_access < ? ORDER BY last_access",
+                                          (now - self.protect_seconds,)).fetchall()
+            entries, total_bytes = totals['entries'], totals['total_bytes']
+            scratch = self._scratch_files() if self.max_bytes > 0 else []
+            scratch_bytes = sum(size for _, size, _ in scratch)
+            total_bytes += scratch_bytes
+            # Working files are rebuilt on demand, so they go before any recording
+            for accessed, size, path in scratch:
+                if total_bytes <= self.max_bytes or accessed >= now - self.protect_seconds:
+                    break
+                try:
+                    os.unlink(path)
+                except OSError as e:
+                    logger.warning(f"Could not remove working file {path}: {e}")
+                    continue
+                self._touched.pop(str(path), None)
+                total_bytes -= size
+                scratch_bytes -= size
+                scratch_removed += 1
+            if self.max_bytes > 0:
+                self._scratch_bytes = (scratch_bytes, time.monotonic())
+            for row in candidates:
+                over_bytes = self.max_bytes > 0 and total_bytes > self.max_bytes
+                over_entries = self.max_entries > 0 and entries > self.max_entries
+                if not over_bytes and not over_entries:
+                    break
+                if row['name'] == keep or not self._with_lock(row, self.remove):
+                    continue
+                entries -= 1
+                total_bytes -= row['size']
+                evicted += 1
+                logger.info(f"Evicted cached recording {row['name']} ({row['size']} bytes)")
+            if (self.max_bytes > 0 and total_bytes > self.max_bytes) or \
+                    (self.max_entries > 0 and entries > self.max_entries):
+                logger.warning(f"Recording cache over its limits ({entries} recordings, {total_bytes} bytes); "
+                               f"remaining recordings were accessed recently or are in use")
+
+        return {"compressed": compressed, "evicted": evicted, "scratch_removed": scratch_removed}
+
+    def _with_lock(self, row, action: Callable[[str, str], object]) -> bool:
+        """Run ``action`` under the recording's lock, skipping it if another worker holds the lock"""
+        try:
+            with self.lock_for(row['game_id'], row['recording_id'], blocking=False):
+                result = action(row['game_id'], row['recording_id'])
+                return result is not False
+        except BlockingIOError:
+            return False
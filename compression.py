@@ -0,0 +1,94 @@
+import io
+import gzip
+import shutil
+from typing import BinaryIO, Optional
+
+try:
+    import zstandard
+except ImportError:  # optional: .zst recordings need the zstandard package
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # optional: responses fall back to gzip
+    brotli = None
+
+# Recording file suffix per storage codec
+CODEC_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+COPY_BUFFER = 1024 * 1024
+
+
+def codec_for(path: str) -> Optional[str]:
+    """Codec of a compressed recording file, or None for plain ``.jsonl``"""
+    for codec, suffix in CODEC_SUFFIXES.items():
+        if str(path).lower().endswith(suffix):
+            return codec
+    return None
+
+
+def strip_codec_suffix(path: str) -> str:
+    codec = codec_for(path)
+    return str(path)[:-len(CODEC_SUFFIXES[codec])] if codec else str(path)
+
+
+def available_codecs():
+    return [codec for codec in CODEC_SUFFIXES if codec != 'zstd' or zstandard is not None]
+
+
+def open_decompressed(path: str) -> BinaryIO:
+    """Binary reader that decompresses ``path`` as it is read"""
+    codec = codec_for(path)
+    if codec == 'gzip':
+        return gzip.open(path, 'rb')
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ValueError("Reading .zst recordings requires the zstandard package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+def open_text(path: str):
+    """Text reader for plain or compressed recordings"""
+    return io.TextIOWrapper(open_decompressed(path), encoding='utf-8')
+
+
+def compress_file(src: str, dst: str, codec: str) -> None:
+    """Stream ``src`` into ``dst`` compressed with ``codec``"""
+    with open(src, 'rb') as source:
+        if codec == 'gzip':
+            with gzip.open(dst, 'wb', compresslevel=6) as target:
+                shutil.copyfileobj(source, target, COPY_BUFFER)
+        elif codec == 'zstd':
+            if zstandard is None:
+                raise ValueError("zstd compression requires the zstandard package")
+            with open(dst, 'wb') as target:
+                zstandard.ZstdCompressor(level=10).copy_stream(source, target, read_size=COPY_BUFFER)
+        else:
+            raise ValueError(f"Unknown codec: {codec}")
+
+
+def decompress_file(src: str, dst: str) -> None:
+    """Stream the compressed recording ``src`` into a plain file ``dst``"""
+    with open_decompressed(src) as source, open(dst, 'wb') as target:
+        shutil.copyfileobj(source, target, COPY_BUFFER)
+
+
+def choose_content_encoding(accept_encoding: str) -> Optional[str]:
+    """Best response encoding the client accepts: br when available, else gzip"""
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
@@ -0,0 +1,456 @@
+"""Export whole recordings to animated GIF, APNG or MP4 in a background process pool.
+
+Frames are read from the memory-mapped grid store and only the rectangle that
+changed since the previous frame is encoded, which keeps GIF and APNG exports of
+long recordings small and quick. MP4 needs an ``ffmpeg`` executable on the PATH.
+"""
+import os
+import time
+import uuid
+import shutil
+import struct
+import logging
+import threading
+import subprocess
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from frame_index import IndexedRecording
+from grid_store import encode_grid, unpack_cells
+from render import PNG_SIGNATURE, png_chunk, png_header_chunks, png_image_data, scaled_rows
+from compression import codec_for
+
+logger = logging.getLogger(__name__)
+
+# Job states, in the order a job moves through them
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+MIMETYPES = {'gif': 'image/gif', 'apng': 'image/apng', 'mp4': 'video/mp4'}
+EXTENSIONS = {'gif': 'gif', 'apng': 'png', 'mp4': 'mp4'}
+
+# (x, y, width, height) in cells
+Rect = Tuple[int, int, int, int]
+
+
+def available_export_formats() -> List[str]:
+    formats = ['gif', 'apng']
+    if shutil.which('ffmpeg'):
+        formats.append('mp4')
+    return formats
+
+
+def iter_frame_cells(filepath: str, index_path: str, grid_path: Optional[str]) -> Iterator[Tuple[int, int, bytes]]:
+    """Yield (height, width, cells) of the displayed (last) layer of every frame"""
+    recording = IndexedRecording.open(filepath, index_path, grid_path)
+    for i in range(len(recording)):
+        grids = recording.grids
+        shape = grids.shape(i) if grids is not None else None
+        if shape is not None:
+            layers, height, width = shape
+            cells = grids.cells(i)
+        else:
+            encoded = encode_grid(recording[i].get('data', {}).get('frame'))
+            if encoded is None:
+                continue
+            layers, height, width, packed = encoded
+            cells = unpack_cells(packed, layers * height * width)
+        size = height * width
+        yield height, width, cells[(layers - 1) * size:layers * size]
+
+
+def fit_cells(cells: bytes, height: int, width: int, canvas_height: int, canvas_width: int) -> bytes:
+    """Crop or pad (with value 0) a grid to the canvas size"""
+    if (height, width) == (canvas_height, canvas_width):
+        return cells
+    blank = bytes(canvas_width)
+    rows = []
+    for r in range(canvas_height):
+        row = cells[r * width:(r + 1) * width] if r < height else b''
+        rows.append(row[:canvas_width] + blank[len(row):])
+    return b''.join(rows)
+
+
+def changed_rect(previous: bytes, current: bytes, height: int, width: int) -> Optional[Rect]:
+    """Smallest rectangle containing every cell that differs, or None if the grids are equal"""
+    if previous == current:
+        return None
+    rows = [r for r in range(height)
+            if previous[r * width:(r + 1) * width] != current[r * width:(r + 1) * width]]
+    left, right = width, 0
+    for r in rows:
+        base = r * width
+        for c in range(width):
+            if previous[base + c] != current[base + c]:
+                left = min(left, c)
+                break
+        for c in range(width - 1, -1, -1):
+            if previous[base + c] != current[base + c]:
+                right = max(right, c + 1)
+                break
+    return left, rows[0], right - left, rows[-1] + 1 - rows[0]
+
+
+def crop_cells(cells: bytes, width: int, rect: Rect) -> bytes:
+    x, y, w, h = rect
+    return b''.join(cells[(y + r) * width + x:(y + r) * width + x + w] for r in range(h))
+
+
+def iter_updates(frames: Iterator[Tuple[int, int, bytes]]) -> Iterator[Tuple[int, int, Rect, bytes, int]]:
+    """Yield (canvas height, canvas width, rect, cells of rect, duration in frames) per visible change.
+
+    The first update covers the whole canvas; frames equal to the previous one
+    extend its duration instead of producing an update.
+    """
+    pending = None
+    previous = None
+    canvas = None
+    for height, width, cells in frames:
+        if canvas is None:
+            canvas = (height, width)
+            previous = cells
+            pending = [(0, 0, width, height), cells, 1]
+            continue
+        cells = fit_cells(cells, height, width, *canvas)
+        rect = changed_rect(previous, cells, *canvas)
+        if rect is None:
+            pending[2] += 1
+            continue
+        yield canvas[0], canvas[1], pending[0], pending[1], pending[2]
+        pending = [rect, crop_cells(cells, canvas[1], rect), 1]
+        previous = cells
+    if pending is not None:
+        yield canvas[0], canvas[1], pending[0], pending[1], pending[2]
+
+
+def scaled_pixels(cells: bytes, height: int, width: int, scale: int) -> bytes:
+    return b''.join(row * scale for row in scaled_rows(cells, height, width, scale))
+
+
+def lzw_encode(pixels: bytes, min_code_size: int = 4) -> bytes:
+    """GIF variant of LZW with variable code size up to 12 bits"""
+    clear = 1 << min_code_size
+    end = clear + 1
+    out = bytearray()
+    buffer = 0
+    bits = 0
+    code_size = min_code_size + 1
+    next_code = end + 1
+    table: Dict[int, int] = {}
+
+    def emit(code: int) -> None:
+        nonlocal buffer, bits
+        buffer |= code << bits
+        bits += code_size
+        while bits >= 8:
+            out.append(buffer & 0xFF)
+            buffer >>= 8
+            bits -= 8
+
+    emit(clear)
+    if not pixels:
+        emit(end)
+        return bytes(out + (bytes([buffer]) if bits else b''))
+    prefix = pixels[0]
+    for value in pixels[1:]:
+        key = (prefix << 8) | value
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        emit(prefix)
+        if next_code < 4095:
+            table[key] = next_code
+            next_code += 1
+            if next_code > (1 << code_size) and code_size < 12:
+                code_size += 1
+        else:
+            emit(clear)
+            table.clear()
+            code_size = min_code_size + 1
+            next_code = end + 1
+        prefix = value
+    emit(prefix)
+    emit(end)
+    if bits:
+        out.append(buffer & 0xFF)
+    return bytes(out)
+
+
+class GifWriter:
+    """Animated GIF with a 16 colour global palette and one sub-rectangle per update"""
+
+    def __init__(self, f: BinaryIO, width: int, height: int, palette: Tuple[bytes, bytes]):
+        self.f = f
+        f.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0xF3, 0, 0))
+        f.write(palette[0][:48].ljust(48, b'\x00'))
+        # Loop forever
+        f.write(b'\x21\xFF\x0BNETSCAPE2.0\x03\x01\x00\x00\x00')
+
+    def add(self, x: int, y: int, width: int, height: int, pixels: bytes, delay: float) -> None:
+        centiseconds = max(2, round(delay * 100))
+        self.f.write(b'\x21\xF9\x04' + struct.pack('<BHBB', 0x04, centiseconds, 0, 0))
+        self.f.write(b'\x2C' + struct.pack('<HHHHB', x, y, width, height, 0) + b'\x04')
+        data = lzw_encode(pixels, 4)
+        for start in range(0, len(data), 255):
+            block = data[start:start + 255]
+            self.f.write(bytes([len(block)]) + block)
+        self.f.write(b'\x00')
+
+    def close(self) -> None:
+        self.f.write(b'\x3B')
+
+
+class ApngWriter:
+    """Animated PNG; the frame count in acTL is patched in on close"""
+
+    def __init__(self, f: BinaryIO, width: int, height: int, palette: Tuple[bytes, bytes]):
+        self.f = f
+        self.frames = 0
+        self.sequence = 0
+        f.write(PNG_SIGNATURE)
+        chunks = png_header_chunks(height, width, palette)
+        f.write(chunks[0])
+        self._actl_offset = f.tell()
+        f.write(png_chunk(b'acTL', struct.pack('>II', 0, 0)))
+        for chunk in chunks[1:]:
+            f.write(chunk)
+
+    def add(self, x: int, y: int, width: int, height: int, data: bytes, delay_num: int, delay_den: int) -> None:
+        """Add a frame whose ``data`` is compressed pixel rows (see render.png_image_data)"""
+        self.f.write(png_chunk(b'fcTL', struct.pack('>IIIIIHHBB', self.sequence, width, height, x, y,
+                                                   delay_num, delay_den, 0, 0)))
+        self.sequence += 1
+        if self.frames == 0:
+            self.f.write(png_chunk(b'IDAT', data))
+        else:
+            self.f.write(png_chunk(b'fdAT', struct.pack('>I', self.sequence) + data))
+            self.sequence += 1
+        self.frames += 1
+
+    def close(self) -> None:
+        self.f.write(png_chunk(b'IEND', b''))
+        end = self.f.tell()
+        self.f.seek(self._actl_offset)
+        self.f.write(png_chunk(b'acTL', struct.pack('>II', self.frames, 0)))
+        self.f.seek(end)
+
+
+def _export_mp4(frames: Iterator[Tuple[int, int, bytes]], output_path: str, palette: Tuple[bytes, bytes],
+                scale: int, fps: int) -> int:
+    rgb = palette[0]
+    # Map palette indices to each colour plane with bytes.translate (ffmpeg's gbrp is planar G, B, R)
+    planes = [bytes(rgb[3 * (i % 16) + channel] for i in range(256)) for channel in (1, 2, 0)]
+    process = None
+    canvas = None
+    count = 0
+    try:
+        for height, width, cells in frames:
+            if canvas is None:
+                canvas = (height, width)
+                command = ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'gbrp',
+                           '-s', f"{width * scale}x{height * scale}", '-r', str(fps), '-i', '-',
+                           '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
+                           '-movflags', '+faststart', '-f', 'mp4', output_path]
+                process = subprocess.Popen(command, stdin=subprocess.PIPE)
+            pixels = scaled_pixels(fit_cells(cells, height, width, *canvas), canvas[0], canvas[1], scale)
+            process.stdin.write(b''.join(pixels.translate(plane) for plane in planes))
+            count += 1
+    finally:
+        if process is not None:
+            process.stdin.close()
+            if process.wait() != 0 and count:
+                raise RuntimeError(f"ffmpeg exited with status {process.returncode}")
+    return count
+
+
+def export_recording(filepath: str, index_path: str, grid_path: Optional[str], output_path: str,
+                     export_format: str, palette: Tuple[bytes, bytes], scale: int = 4, fps: int = 5) -> Dict:
+    """Render every frame of a recording into ``output_path``; runs in a worker process"""
+    started = time.time()
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    frames = iter_frame_cells(filepath, index_path, grid_path)
+    count = 0
+    try:
+        if export_format == 'mp4':
+            count = _export_mp4(frames, tmp_path, palette, scale, fps)
+        else:
+            with open(tmp_path, 'wb') as f:
+                writer = None
+                for height, width, rect, cells, duration in iter_updates(frames):
+                    if writer is None:
+                        writer_class = GifWriter if export_format == 'gif' else ApngWriter
+                        writer = writer_class(f, width * scale, height * scale, palette)
+                    x, y, w, h = (v * scale for v in rect)
+                    if export_format == 'gif':
+                        writer.add(x, y, w, h, scaled_pixels(cells, rect[3], rect[2], scale), duration / fps)
+                    else:
+                        writer.add(x, y, w, h, png_image_data(cells, rect[3], rect[2], scale), duration, fps)
+                    count += duration
+                if writer is not None:
+                    writer.close()
+        if not count:
+            raise ValueError("Recording has no frames with a grid")
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {"frames": count, "bytes": os.path.getsize(output_path), "seconds": round(time.time() - started, 3)}
+
+
+class ExportJob:
+    """One export of a recording, resolved and awaited in a thread while a worker process renders it"""
+
+    def __init__(self, fetcher, source: Dict, output_path: Path, export_format: str,
+                 palette: Tuple[bytes, bytes], scale: int, fps: int):
+        self.job_id = uuid.uuid4().hex
+        self.fetcher = fetcher
+        self.source = source
+        self.output_path = output_path
+        self.format = export_format
+        self.palette = palette
+        self.scale = scale
+        self.fps = fps
+        self.status = QUEUED
+        self.cached = False
+        self.result = None
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def source_path(self) -> Optional[str]:
+        if 'game_id' in self.source:
+            return self.fetcher.fetch_and_cache_recording(self.source['game_id'], self.source['recording_id'])
+        filepath = self.source.get('filepath')
+        if filepath and codec_for(filepath):
+            return self.fetcher.get_decompressed_path(filepath)
+        return filepath if filepath and os.path.exists(filepath) else None
+
+    def run(self, pool: ProcessPoolExecutor) -> 'ExportJob':
+        try:
+            if self.output_path.exists():
+                self.cached = True
+                self.result = {"bytes": self.output_path.stat().st_size}
+                self.status = DONE
+                return self
+            filepath = self.source_path()
+            if not filepath:
+                raise ValueError("Recording is not available")
+            self.status = RUNNING
+            future = pool.submit(export_recording, filepath, str(self.fetcher.get_index_path(filepath)),
+                                 str(self.fetcher.get_grid_path(filepath)), str(self.output_path), self.format,
+                                 self.palette, self.scale, self.fps)
+            self.result = future.result()
+            self.status = DONE
+            logger.info(f"Exported {self.output_path.name}: {self.result}")
+        except Exception as e:
+            logger.error(f"Error exporting {self.source} to {self.format}: {e}")
+            self.error = str(e)
+            self.status = FAILED
+        finally:
+            self.finished_at = time.time()
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "done": self.done,
+            "format": self.format,
+            "scale": self.scale,
+            "fps": self.fps,
+            "source": {k: v for k, v in self.source.items() if k != 'filepath'},
+            "cached": self.cached,
+            "result": self.result,
+            "error": self.error,
+            "elapsed": round((self.finished_at or time.time()) - self.started_at, 3),
+        }
+
+
+class ExportQueue:
+    """Runs export jobs in a process pool so rendering never blocks request threads.
+
+    Outputs are cached under ``export_dir`` by recording key, format, scale and
+    fps; a request for an export that is already queued or running joins that job.
+    The oldest outputs are removed once the directory exceeds ``max_bytes``.
+    """
+
+    def __init__(self, fetcher, export_dir: str, max_workers: int = 2, max_bytes: int = 0, max_jobs: int = 100):
+        self.fetcher = fetcher
+        self.export_dir = Path(export_dir).resolve()
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max(1, max_workers)
+        self.max_bytes = max_bytes
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._active: Dict[Path, ExportJob] = {}
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created on first use; spawned workers do not inherit the server's threads and sockets
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def output_path(self, recording_key: str, export_format: str, scale: int, fps: int) -> Path:
+        return self.export_dir / f"{recording_key}-s{scale}-f{fps}.{EXTENSIONS[export_format]}"
+
+    def submit(self, recording_key: str, source: Dict, export_format: str, palette: Tuple[bytes, bytes],
+               scale: int = 4, fps: int = 5) -> ExportJob:
+        output_path = self.output_path(recording_key, export_format, scale, fps)
+        with self._lock:
+            active = self._active.get(output_path)
+            if active is not None and not active.done:
+                return active
+            job = ExportJob(self.fetcher, source, output_path, export_format, palette, scale, fps)
+            self._active[output_path] = job
+            self.jobs[job.job_id] = job
+            while len(self.jobs) > self.max_jobs:
+                self.jobs.popitem(last=False)
+            pool = self._get_pool()
+        threading.Thread(target=self._run, args=(job, pool), daemon=True, name=f"export-{job.job_id[:8]}").start()
+        return job
+
+    def _run(self, job: ExportJob, pool: ProcessPoolExecutor) -> None:
+        job.run(pool)
+        with self._lock:
+            if self._active.get(job.output_path) is job:
+                del self._active[job.output_path]
+        if job.status == DONE and not job.cached:
+            self.enforce_limits(keep=job.output_path)
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def enforce_limits(self, keep: Optional[Path] = None) -> None:
+        """Remove the least recently written exports beyond ``max_bytes``"""
+        if not self.max_bytes:
+            return
+        files = sorted((p for p in self.export_dir.iterdir() if p.suffix != '.tmp' and p.is_file()),
+                       key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            logger.info(f"Evicted export {path.name}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            active = sum(1 for job in self._active.values() if not job.done)
+        return {"active_jobs": active, "max_workers": self.max_workers, "formats": available_export_formats()}
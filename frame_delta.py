@@ -0,0 +1,116 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Deltas are cached per recording object, so they are shared by every session viewing it
+_delta_caches: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_delta_caches_lock = threading.Lock()
+
+
+class DeltaCache:
+    """Small thread-safe LRU of computed deltas for one recording"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, int], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[int, int]) -> Optional[Dict]:
+        with self._lock:
+            delta = self._entries.get(key)
+            if delta is not None:
+                self._entries.move_to_end(key)
+            return delta
+
+    def put(self, key: Tuple[int, int], delta: Dict) -> None:
+        with self._lock:
+            self._entries[key] = delta
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def get_delta_cache(frames) -> Optional[DeltaCache]:
+    """Delta cache attached to a recording, or None for plain lists (uploads)"""
+    try:
+        with _delta_caches_lock:
+            cache = _delta_caches.get(frames)
+            if cache is None:
+                cache = DeltaCache()
+                _delta_caches[frames] = cache
+            return cache
+    except TypeError:
+        return None
+
+
+def displayed_layer_cells(frames, frame_index: int) -> Optional[Tuple[int, int, bytes]]:
+    """(height, width, cells) of the last layer of a frame, the one the player draws"""
+    grids = getattr(frames, 'grids', None)
+    if grids is not None:
+        shape = grids.shape(frame_index)
+        if shape is not None:
+            layers, height, width = shape
+            if not layers:
+                return None
+            layer_size = height * width
+            return height, width, grids.cells(frame_index)[(layers - 1) * layer_size:]
+
+    grid = frames[frame_index]['data'].get('frame')
+    if not grid:
+        return None
+    layer = grid[-1]
+    height = len(layer)
+    width = len(layer[0]) if height else 0
+    try:
+        return height, width, bytes(value for row in layer for value in row)
+    except (TypeError, ValueError):
+        return None
+
+
+def diff_runs(before: bytes, after: bytes, height: int, width: int) -> List[List[Any]]:
+    """Changed cells as ``[row, col, [values...]]`` runs of consecutive columns"""
+    runs = []
+    for row in range(height):
+        start = row * width
+        old_row = before[start:start + width]
+        new_row = after[start:start + width]
+        if old_row == new_row:
+            continue
+        col = 0
+        while col < width:
+            if old_row[col] == new_row[col]:
+                col += 1
+                continue
+            run_start = col
+            while col < width and old_row[col] != new_row[col]:
+                col += 1
+            runs.append([row, run_start, list(new_row[run_start:col])])
+    return runs
+
+
+def compute_delta(frames, from_index: int, to_index: int) -> Dict:
+    """Delta of the displayed layer between two frames.
+
+    Returns ``{"runs": [...], "changed_cells": n}`` when both layers have the same
+    shape, otherwise ``{"full": layer}`` with the complete layer of ``to_index``.
+    """
+    cache = get_delta_cache(frames)
+    key = (from_index, to_index)
+    if cache is not None:
+        delta = cache.get(key)
+        if delta is not None:
+            return delta
+
+    before = displayed_layer_cells(frames, from_index)
+    after = displayed_layer_cells(frames, to_index)
+    if before is not None and after is not None and before[:2] == after[:2]:
+        height, width = after[:2]
+        runs = diff_runs(before[2], after[2], height, width)
+        delta = {"runs": runs, "changed_cells": sum(len(run[2]) for run in runs)}
+    else:
+        grid = frames[to_index]['data'].get('frame') or [[]]
+        delta = {"full": grid[-1]}
+
+    if cache is not None:
+        cache.put(key, delta)
+    return delta
@@ -0,0 +1,314 @@
+import os
+import struct
+import tempfile
+import threading
+import logging
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from grid_store import GridStore, GridStoreWriter, build_grid_store
+from serializer import loads
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b'FRMIDX01'
+# magic, source size, source mtime_ns, frame count
+INDEX_HEADER = struct.Struct('<8sQQQ')
+
+
+def is_valid_frame(data) -> bool:
+    """Frames must carry a ``data.frame`` grid to be shown"""
+    return isinstance(data, dict) and isinstance(data.get('data'), dict) and 'frame' in data['data']
+
+
+class FrameIndexBuilder:
+    """Incrementally index a JSONL stream as raw chunks arrive.
+
+    Chunks are split on newlines only to find frame boundaries; the bytes
+    themselves are written elsewhere untouched. ``frame_callback`` receives the
+    grid of each valid frame in order (used to build the grid store from the same parse).
+    """
+
+    def __init__(self, frame_callback: Optional[Callable[[List], None]] = None):
+        self.frame_callback = frame_callback
+        self.offsets = array('Q')
+        self.lengths = array('Q')
+        self.error_count = 0
+        self._pending = b''
+        self._line_start = 0
+        self._line_num = 0
+
+    def feed(self, chunk: bytes) -> None:
+        data = self._pending + chunk if self._pending else chunk
+        lines = data.split(b'\n')
+        self._pending = lines.pop()
+        for line in lines:
+            self._add_line(line, len(line) + 1)
+
+    def finish(self) -> None:
+        """Index a trailing line that has no newline"""
+        if self._pending:
+            pending, self._pending = self._pending, b''
+            self._add_line(pending, len(pending))
+
+    def _add_line(self, line: bytes, length: int) -> None:
+        self._line_num += 1
+        stripped = line.strip()
+        if stripped:
+            try:
+                data = loads(stripped)
+                if is_valid_frame(data):
+                    if self.frame_callback:
+                        self.frame_callback(data['data']['frame'])
+                    self.offsets.append(self._line_start)
+                    self.lengths.append(length)
+                else:
+                    self.error_count += 1
+                    logger.warning(f"Invalid frame structure at line {self._line_num}")
+            except ValueError as e:
+                self.error_count += 1
+                logger.warning(f"JSON decode error at line {self._line_num}: {e}")
+        self._line_start += length
+
+
+def scan_frame_offsets(filepath: str,
+                       frame_callback: Optional[Callable[[List], None]] = None) -> Tuple[array, array]:
+    """Scan a JSONL recording and return (offsets, lengths) of its valid frame lines"""
+    builder = FrameIndexBuilder(frame_callback)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            builder.feed(chunk)
+    builder.finish()
+
+    logger.info(f"Indexed {len(builder.offsets)} frames, {builder.error_count} errors")
+    return builder.offsets, builder.lengths
+
+
+def write_frame_index(index_path: str, filepath: str, offsets: Iterable[int], lengths: Iterable[int]) -> None:
+    """Write a sidecar index for ``filepath`` atomically"""
+    offsets = array('Q', offsets)
+    lengths = array('Q', lengths)
+    stat = os.stat(filepath)
+    directory = os.path.dirname(os.path.abspath(index_path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, stat.st_size, stat.st_mtime_ns, len(offsets)))
+            f.write(offsets.tobytes())
+            f.write(lengths.tobytes())
+        os.replace(temp_path, index_path)
+    except Exception:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_frame_index(index_path: str, filepath: str) -> Optional[Tuple[array, array]]:
+    """Read a sidecar index, returning None when it is missing or stale"""
+    try:
+        with open(index_path, 'rb') as f:
+            header = f.read(INDEX_HEADER.size)
+            if len(header) != INDEX_HEADER.size:
+                return None
+            magic, size, mtime_ns, count = INDEX_HEADER.unpack(header)
+            stat = os.stat(filepath)
+            if magic != INDEX_MAGIC or size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                return None
+            offsets = array('Q')
+            lengths = array('Q')
+            offsets.fromfile(f, count)
+            lengths.fromfile(f, count)
+            return offsets, lengths
+    except (OSError, EOFError):
+        return None
+
+
+def load_frame_index(filepath: str, index_path: str, grid_path: Optional[str] = None) -> Tuple[array, array]:
+    """Read the sidecar index for ``filepath``, building and saving it if needed.
+
+    When the index has to be built and ``grid_path`` is given, the grid store is
+    written from the same pass over the file.
+    """
+    index = read_frame_index(index_path, filepath)
+    if index is not None:
+        return index
+
+    writer = GridStoreWriter(grid_path) if grid_path else None
+    try:
+        offsets, lengths = scan_frame_offsets(filepath, writer.add if writer else None)
+        if writer:
+            writer.close(filepath)
+    except Exception:
+        if writer:
+            writer.abort()
+        raise
+    try:
+        write_frame_index(index_path, filepath, offsets, lengths)
+    except OSError as e:
+        logger.warning(f"Could not save frame index {index_path}: {e}")
+    return offsets, lengths
+
+
+class IndexedRecording:
+    """Read-only sequence of frames decoded on demand from a JSONL file.
+
+    Only the requested line is read and parsed; a small LRU keeps recently
+    decoded frames so stepping back and forth stays cheap. With a grid store,
+    the LRU keeps frames without their grid and grids are unpacked from the
+    memory-mapped store on access.
+    """
+
+    # The full recording is on disk
+    complete = True
+
+    def __init__(self, filepath: str, offsets: array, lengths: array, decoded_cache_size: int = 32,
+                 grids: Optional[GridStore] = None):
+        self.filepath = filepath
+        self.offsets = offsets
+        self.lengths = lengths
+        self.grids = grids
+        self.decoded_cache_size = decoded_cache_size
+        self._average_line = sum(lengths) // len(lengths) if lengths else 0
+        self._decoded: "OrderedDict[int, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, filepath: str, index_path: str, grid_path: Optional[str] = None) -> 'IndexedRecording':
+        offsets, lengths = load_frame_index(filepath, index_path, grid_path)
+        recording = cls(filepath, offsets, lengths)
+        if grid_path:
+            recording.grids = GridStore.open(grid_path, filepath)
+            if recording.grids is None:
+                # Recordings cached before grid stores existed get one built in the background
+                threading.Thread(target=recording._build_grids, args=(grid_path,), daemon=True).start()
+        return recording
+
+    def _build_grids(self, grid_path: str) -> None:
+        try:
+            build_grid_store(self.filepath, grid_path, self.offsets, self.lengths,
+                             lambda line: loads(line)['data'].get('frame'))
+            self.grids = GridStore.open(grid_path, self.filepath)
+        except Exception as e:
+            logger.warning(f"Could not build grid store {grid_path}: {e}")
+
+    @property
+    def estimated_bytes(self) -> int:
+        # Index arrays plus an average decoded frame per cache slot
+        index_bytes = len(self.offsets) * 16
+        return index_bytes + self._average_line * min(self.decoded_cache_size, len(self.lengths))
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, frame_index: int) -> Dict:
+        if frame_index < 0:
+            frame_index += len(self)
+        frame = self.meta(frame_index)
+        if 'frame' not in frame['data']:
+            frame = dict(frame, data=dict(frame['data'], frame=self.grids.grid(frame_index)))
+        return frame
+
+    def meta(self, frame_index: int) -> Dict:
+        """Decoded frame that may lack ``data.frame`` when the grid is in the grid store"""
+        if not 0 <= frame_index < len(self):
+            raise IndexError(f"frame index {frame_index} out of range")
+
+        with self._lock:
+            frame = self._decoded.get(frame_index)
+            if frame is not None:
+                self._decoded.move_to_end(frame_index)
+
+        if frame is None:
+            frame = loads(self.read_line(frame_index))
+            if self.grids is not None and self.grids.shape(frame_index) is not None:
+                # Keep only the metadata resident; the grid lives in the mapped store
+                frame = dict(frame, data={k: v for k, v in frame['data'].items() if k != 'frame'})
+            with self._lock:
+                self._decoded[frame_index] = frame
+                while len(self._decoded) > self.decoded_cache_size:
+                    self._decoded.popitem(last=False)
+        return frame
+
+    def grid(self, frame_index: int) -> List:
+        """Grid of a frame, from the grid store when one is available"""
+        if self.grids is not None:
+            grid = self.grids.grid(frame_index)
+            if grid is not None:
+                return grid
+        return self[frame_index]['data']['frame']
+
+    def read_line(self, frame_index: int) -> bytes:
+        """Return the raw JSON bytes of a frame"""
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.offsets[frame_index])
+            return f.read(self.lengths[frame_index])
+
+    def __iter__(self):
+        for frame_index in range(len(self)):
+            yield self[frame_index]
+
+
+class RecordingUnavailable(FileNotFoundError):
+    """The file behind frames already served is gone (e.g. every download attempt failed)"""
+
+
+class LiveRecording(IndexedRecording):
+    """Frames of a recording that is still being downloaded.
+
+    Reads the partial file and the index that the download builds as it goes
+    (``progress`` is a ``recording_fetcher.DownloadProgress``); once the download
+    is renamed into place, reads move to the final file.
+    """
+
+    def __init__(self, progress, decoded_cache_size: int = 32):
+        self.progress = progress
+        self.grids = None
+        self.decoded_cache_size = decoded_cache_size
+        self._average_line = 0
+        self._decoded: "OrderedDict[int, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return self.progress.done and self.progress.path is not None
+
+    @property
+    def offsets(self) -> array:
+        builder = self.progress.builder
+        return builder.offsets if builder is not None else array('Q')
+
+    @property
+    def lengths(self) -> array:
+        builder = self.progress.builder
+        return builder.lengths if builder is not None else array('Q')
+
+    @property
+    def filepath(self) -> Optional[str]:
+        return self.progress.path or self.progress.partial_path
+
+    def __len__(self) -> int:
+        # Lengths are appended after offsets, so they bound the frames fully indexed
+        return len(self.lengths)
+
+    def read_line(self, frame_index: int) -> bytes:
+        offset = self.offsets[frame_index]
+        length = self.lengths[frame_index]
+        # The file may be renamed from its partial name between looking it up and opening it
+        for path in (self.progress.path, self.progress.partial_path, self.progress.path):
+            if not path:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    return f.read(length)
+            except FileNotFoundError:
+                continue
+        progress = self.progress
+        if progress.done and progress.path is None:
+            raise RecordingUnavailable(f"Download of {progress.game_id}/{progress.recording_id} failed "
+                                       f"({progress.error or 'unknown error'}); reload the recording")
+        raise RecordingUnavailable(f"Recording file for frame {frame_index} is no longer available")
@@ -0,0 +1,215 @@
+import os
+import mmap
+import struct
+import tempfile
+import logging
+from array import array
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+GRID_MAGIC = b'FRMGRD01'
+# magic, source size, source mtime_ns, frame count, table offset
+GRID_FOOTER = struct.Struct('<8sQQQQ')
+# Table entry per frame: data offset, layers, height, width
+TABLE_FIELDS = 4
+# Marks frames whose grid could not be packed (ragged layers or values outside the palette)
+NOT_STORED = 0xFFFFFFFFFFFFFFFF
+
+# Nibble lookup tables used with bytes.translate so packing runs at C speed
+_HIGH_NIBBLE = bytes((b >> 4) for b in range(256))
+_LOW_NIBBLE = bytes((b & 0x0F) for b in range(256))
+_SHIFT_LEFT_4 = bytes(((b << 4) & 0xFF) for b in range(256))
+
+
+def pack_cells(cells: bytes) -> bytes:
+    """Pack cell values 0-15 two per byte (first cell in the high nibble)"""
+    if len(cells) % 2:
+        cells += b'\x00'
+    high = cells[0::2].translate(_SHIFT_LEFT_4)
+    low = cells[1::2]
+    # Nibbles never overlap, so adding the big-endian integers ORs them bytewise
+    packed = int.from_bytes(high, 'big') + int.from_bytes(low, 'big')
+    return packed.to_bytes(len(high), 'big')
+
+
+def unpack_cells(packed: bytes, count: int) -> bytes:
+    """Inverse of :func:`pack_cells`, returning one byte per cell"""
+    cells = bytearray(len(packed) * 2)
+    cells[0::2] = packed.translate(_HIGH_NIBBLE)
+    cells[1::2] = packed.translate(_LOW_NIBBLE)
+    return bytes(cells[:count])
+
+
+def encode_grid(grid) -> Optional[Tuple[int, int, int, bytes]]:
+    """Return (layers, height, width, packed) for a 3D grid, or None if it cannot be packed"""
+    if not isinstance(grid, list):
+        return None
+    if not grid:
+        return 0, 0, 0, b''
+    height = len(grid[0])
+    width = len(grid[0][0]) if height else 0
+    flat = bytearray()
+    try:
+        for layer in grid:
+            if len(layer) != height:
+                return None
+            for row in layer:
+                if len(row) != width:
+                    return None
+                flat.extend(row)
+    except (TypeError, ValueError):
+        # Non-integer cells or values outside 0-255
+        return None
+    if flat and max(flat) > 15:
+        return None
+    return len(grid), height, width, pack_cells(bytes(flat))
+
+
+def cells_to_grid(cells: bytes, layers: int, height: int, width: int) -> List:
+    """Rebuild the nested list representation used in the JSON recordings"""
+    layer_size = height * width
+    return [
+        [list(cells[base + row * width:base + (row + 1) * width]) for row in range(height)]
+        for base in range(0, layers * layer_size, layer_size)
+    ]
+
+
+class GridStoreWriter:
+    """Writes packed 4-bit grids for consecutive frames to a ``.grids`` file"""
+
+    def __init__(self, grid_path: str):
+        self.grid_path = grid_path
+        directory = os.path.dirname(os.path.abspath(grid_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        self._file = os.fdopen(fd, 'wb')
+        self._table = array('Q')
+        self._offset = 0
+
+    def add(self, grid) -> None:
+        encoded = encode_grid(grid)
+        if encoded is None:
+            self._table.extend((NOT_STORED, 0, 0, 0))
+            return
+        layers, height, width, packed = encoded
+        self._table.extend((self._offset, layers, height, width))
+        self._file.write(packed)
+        self._offset += len(packed)
+
+    def close(self, filepath: str) -> None:
+        """Finish the store for ``filepath`` and move it into place"""
+        try:
+            stat = os.stat(filepath)
+            self._file.write(self._table.tobytes())
+            self._file.write(GRID_FOOTER.pack(GRID_MAGIC, stat.st_size, stat.st_mtime_ns,
+                                              len(self._table) // TABLE_FIELDS, self._offset))
+            self._file.close()
+            os.replace(self.temp_path, self.grid_path)
+        except Exception:
+            self.abort()
+            raise
+
+    def abort(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.unlink(self.temp_path)
+        except OSError:
+            pass
+
+
+class GridStore:
+    """Memory-mapped packed grids of a recording.
+
+    Each cell takes half a byte on disk, and pages are shared by every process
+    that maps the file instead of being held as Python lists per worker.
+    """
+
+    def __init__(self, grid_path: str, buffer: mmap.mmap, table: array):
+        self.grid_path = grid_path
+        self._buffer = buffer
+        self._table = table
+
+    @classmethod
+    def open(cls, grid_path: str, filepath: str) -> Optional['GridStore']:
+        """Map the store for ``filepath``, returning None when it is missing or stale"""
+        try:
+            with open(grid_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < GRID_FOOTER.size:
+                    return None
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        magic, source_size, mtime_ns, count, table_offset = GRID_FOOTER.unpack(buffer[size - GRID_FOOTER.size:])
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            buffer.close()
+            return None
+        table_end = table_offset + count * TABLE_FIELDS * 8
+        if (magic != GRID_MAGIC or source_size != stat.st_size or mtime_ns != stat.st_mtime_ns
+                or table_end != size - GRID_FOOTER.size):
+            buffer.close()
+            return None
+
+        table = array('Q')
+        table.frombytes(buffer[table_offset:table_end])
+        return cls(grid_path, buffer, table)
+
+    def __len__(self) -> int:
+        return len(self._table) // TABLE_FIELDS
+
+    def shape(self, frame_index: int) -> Optional[Tuple[int, int, int]]:
+        """(layers, height, width) of a stored frame, or None if it was not stored"""
+        base = frame_index * TABLE_FIELDS
+        if self._table[base] == NOT_STORED:
+            return None
+        return self._table[base + 1], self._table[base + 2], self._table[base + 3]
+
+    def packed(self, frame_index: int) -> Optional[bytes]:
+        """Packed 4-bit cells of a frame exactly as stored"""
+        shape = self.shape(frame_index)
+        if shape is None:
+            return None
+        layers, height, width = shape
+        offset = self._table[frame_index * TABLE_FIELDS]
+        return self._buffer[offset:offset + (layers * height * width + 1) // 2]
+
+    def cells(self, frame_index: int) -> Optional[bytes]:
+        """One byte per cell, layer-major then row-major"""
+        packed = self.packed(frame_index)
+        if packed is None:
+            return None
+        layers, height, width = self.shape(frame_index)
+        return unpack_cells(packed, layers * height * width)
+
+    def grid(self, frame_index: int) -> Optional[List]:
+        """Nested list grid as found in the JSON recording"""
+        cells = self.cells(frame_index)
+        if cells is None:
+            return None
+        return cells_to_grid(cells, *self.shape(frame_index))
+
+    def close(self) -> None:
+        self._buffer.close()
+
+
+def build_grid_store(filepath: str, grid_path: str, offsets: array, lengths: array, decode_grid) -> None:
+    """Build a grid store from an existing recording and its frame index.
+
+    ``decode_grid`` returns the grid of one raw frame line.
+    """
+    writer = GridStoreWriter(grid_path)
+    try:
+        with open(filepath, 'rb') as f:
+            for offset, length in zip(offsets, lengths):
+                f.seek(offset)
+                writer.add(decode_grid(f.read(length)))
+        writer.close(filepath)
+    except Exception:
+        writer.abort()
+        raise
+    logger.info(f"Built grid store {grid_path} ({len(offsets)} frames)")
@@ -0,0 +1,112 @@
+import os
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (mtime_ns, size) of the source file; a change invalidates every tier
+Signature = Tuple[int, int]
+
+
+def file_signature(filepath: str) -> Signature:
+    stat = os.stat(filepath)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class _CacheEntry:
+    __slots__ = ("signature", "frames", "size")
+
+    def __init__(self, signature: Signature, frames: Sequence[Dict], size: int):
+        self.signature = signature
+        self.frames = frames
+        self.size = size
+
+
+class ParsedRecordingCache:
+    """Process-wide LRU cache of parsed recordings shared by all sessions.
+
+    Entries are keyed by recording (``game_id/recording_id`` or a file path) and
+    validated against the source file's mtime and size. Sizes are accounted using
+    the value's ``estimated_bytes`` when it has one (indexed recordings) or the
+    size of the source file. Other worker processes share the work through the
+    sidecar frame index written next to each cached recording.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Per-key load locks and their waiter counts, so concurrent misses parse a recording once
+        self._loads: Dict[str, list] = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, filepath: str) -> Optional[Sequence[Dict]]:
+        """Return cached frames for ``key`` if they still match ``filepath``"""
+        signature = file_signature(filepath)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.frames
+        return None
+
+    def get_or_load(self, key: str, filepath: str,
+                    loader: Callable[[str], Sequence[Dict]]) -> Sequence[Dict]:
+        """Return cached frames or parse ``filepath`` with ``loader`` and cache the result.
+        
+        Concurrent misses for the same key wait for a single load instead of each parsing the file.
+        """
+        frames = self.get(key, filepath)
+        if frames is not None:
+            return frames
+
+        with self._lock:
+            load = self._loads.setdefault(key, [threading.Lock(), 0])
+            load[1] += 1
+        try:
+            with load[0]:
+                # The recording may have been loaded while this thread waited
+                frames = self.get(key, filepath)
+                if frames is not None:
+                    return frames
+
+                self.misses += 1
+                signature = file_signature(filepath)
+                frames = loader(filepath)
+                if frames:
+                    self._store(key, signature, frames, getattr(frames, 'estimated_bytes', signature[1]))
+                return frames
+        finally:
+            with self._lock:
+                load[1] -= 1
+                if not load[1]:
+                    del self._loads[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _store(self, key: str, signature: Signature, frames: Sequence[Dict], size: int) -> None:
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self._entries[key] = _CacheEntry(signature, frames, size)
+            self.total_bytes += size
+
+            # Evict least recently used entries, always keeping the newest one
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_entry = self._entries.popitem(last=False)
+                self.total_bytes -= old_entry.size
+                logger.info(f"Evicted parsed recording {old_key} ({old_entry.size} bytes)")
@@ -1,90 +1,357 @@
 import requests
-import json
+from requests.adapters import HTTPAdapter
 import os
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import time
 import logging
 from datetime import datetime, timedelta
 import hashlib
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from frame_index import FrameIndexBuilder, is_valid_frame, write_frame_index
+from grid_store import GridStoreWriter
+from cache_manager import RecordingCacheManager, recording_filename
+from compression import decompress_file
+from serializer import dumps
+from summary import RecordingSummaryBuilder, iter_recording_frames
+from search_index import SearchIndex, frame_row
+from metrics import DISK_CACHE_LOOKUPS, DOWNLOAD_BYTES, DOWNLOADED_BYTES_TOTAL, FETCH_SECONDS
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+try:
+    from gevent import monkey as gevent_monkey
+except ImportError:
+    gevent_monkey = None
 
 logger = logging.getLogger(__name__)
 
+# How often a lock held elsewhere is retried when waiting must not block the process (gevent)
+LOCK_POLL_SECONDS = 0.05
+
+def gevent_patched() -> bool:
+    """True when gevent has patched this process (gunicorn ``-k gevent``), so blocking calls stall every greenlet"""
+    return gevent_monkey is not None and gevent_monkey.is_module_patched('socket')
+
+@contextmanager
+def file_lock(lock_path: str, blocking: bool = True):
+    """Exclusive lock shared by every worker process, held while the context is open.
+    
+    With ``blocking=False`` a lock held elsewhere raises ``BlockingIOError`` instead of waiting.
+    Under gevent the wait polls with a (patched, so yielding) sleep instead of
+    blocking in the kernel, which would stall every greenlet of the worker.
+    """
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    poll = blocking and gevent_patched()
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            if poll:
+                while True:
+                    try:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        time.sleep(LOCK_POLL_SECONDS)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking and not poll else msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if not blocking:
+                        raise BlockingIOError(f"{lock_path} is locked")
+                    if poll:
+                        time.sleep(LOCK_POLL_SECONDS)
+                    # LK_LOCK gives up after about 10 seconds
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class DownloadProgress:
+    """Progress of a streaming recording download"""
+    
+    def __init__(self, game_id: str, recording_id: str):
+        self.game_id = game_id
+        self.recording_id = recording_id
+        self.bytes_downloaded = 0
+        self.total_bytes = None  # Content-Length when the server sends one
+        self.frames = 0
+        self.attempt = 0
+        self.done = False
+        self.error = None
+        self.path = None
+        self.started_at = time.time()
+        self.finished_at = None
+        
+        # Live view of the current attempt so frames can be served before the download finishes
+        self.partial_path = None
+        self.builder = None
+        self.frames_ready = threading.Event()  # set once a frame is on disk or the download ended
+        self.finished = threading.Event()
+    
+    def to_dict(self) -> Dict:
+        percent = None
+        if self.total_bytes:
+            percent = round(min(100.0, self.bytes_downloaded * 100 / self.total_bytes), 1)
+        return {
+            "game_id": self.game_id,
+            "recording_id": self.recording_id,
+            "bytes_downloaded": self.bytes_downloaded,
+            "total_bytes": self.total_bytes,
+            "percent": percent,
+            "frames": self.frames,
+            "attempt": self.attempt,
+            "done": self.done,
+            "error": self.error,
+            "elapsed": round((self.finished_at or time.time()) - self.started_at, 3),
+        }
+
+
 class RecordingFetcher:
-    def __init__(self, storage_dir: str = "recordings_cache", max_retries: int = 3, timeout: int = 30):
-        self.base_url = "https://three.arcprize.org/api/recordings"
+    def __init__(self, storage_dir: str = "recordings_cache", max_retries: int = 3, timeout: int = 30,
+                 chunk_size: int = 64 * 1024, base_url: str = "https://three.arcprize.org/api/recordings",
+                 pool_size: int = 16, max_cache_bytes: int = 0, max_cache_entries: int = 0,
+                 compress_after: float = 0, protect_seconds: float = 300, cache_codec: str = 'gzip'):
+        self.base_url = base_url.rstrip('/')
         self.storage_dir = Path(storage_dir)
         self.storage_dir.mkdir(exist_ok=True)
         self.max_retries = max_retries
         self.timeout = timeout
+        self.chunk_size = chunk_size
+        
+        # Progress of current and recent downloads, keyed by "game_id/recording_id"
+        self.progress: Dict[str, DownloadProgress] = {}
+        self._progress_lock = threading.Lock()
+        
+        # Keep-alive connections shared by all downloads, sized for concurrent bulk prefetches
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Per-frame search rows, dropped whenever the manifest forgets a recording
+        self.search = SearchIndex(self.storage_dir)
+        
+        # Manifest and size limits of storage_dir (0 disables a limit)
+        self.cache = RecordingCacheManager(
+            self.storage_dir,
+            lock_for=lambda game_id, recording_id, blocking=True: file_lock(
+                self.get_lock_path(game_id, recording_id), blocking=blocking),
+            max_bytes=max_cache_bytes,
+            max_entries=max_cache_entries,
+            compress_after=compress_after,
+            protect_seconds=protect_seconds,
+            codec=cache_codec,
+            on_forget=self.search.forget,
+        )
+        # Summaries and search rows of downloaded recordings are built off the download path, one at a time.
+        # The pool is created on first use in each process: a worker forked after import
+        # (gunicorn --preload) inherits the pool object but not its thread.
+        self._summary_executor: Optional[ThreadPoolExecutor] = None
+        self._summary_pid = None
+        self._summary_lock = threading.Lock()
 
 
-    def fetch_recording(self, game_id: str, recording_id: str) -> Optional[List[Dict]]:
-        """Fetch a recording from the ARC API with retry logic and progress tracking"""
+    def download_recording(self, game_id: str, recording_id: str,
+                           progress_callback: Optional[Callable[[DownloadProgress], None]] = None,
+                           progress: Optional[DownloadProgress] = None) -> Optional[str]:
+        """Stream a recording straight into the cache without decoding and re-encoding it.
+        
+        The body is written chunk by chunk to a temp file in ``storage_dir`` while the
+        frame index is built alongside, then renamed into place, so peak memory stays
+        at one chunk (plus one partial line) regardless of recording size.
+        ``progress_callback`` is called with a :class:`DownloadProgress` after every chunk.
+        """
         url = f"{self.base_url}/{game_id}/{recording_id}"
+        filepath = self.storage_dir / f"{game_id}-{recording_id}.jsonl"
+        if progress is None:
+            progress, owner = self._claim_download(game_id, recording_id)
+            if not owner:
+                progress.finished.wait()
+                return progress.path
         
-        for attempt in range(self.max_retries):
-            try:
-                logger.info(f"Fetching recording from: {url} (attempt {attempt + 1}/{self.max_retries})")
-                
-                response = requests.get(url, timeout=self.timeout)
-                response.raise_for_status()
-                
-                # Parse NDJSON format (each line is a JSON object)
-                frames = []
-                lines = response.text.strip().split('\n')
-                total_lines = len(lines)
-                
-                for line_num, line in enumerate(lines, 1):
-                    if line.strip():
-                        try:
-                            frame_data = json.loads(line.strip())
-                            frames.append(frame_data)
-                            
-                            # Log progress for large files
-                            if total_lines > 1000 and line_num % 100 == 0:
-                                progress = (line_num / total_lines) * 100
-                                logger.info(f"Parsing progress: {progress:.1f}% ({line_num}/{total_lines})")
-                                
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"Error parsing line {line_num}: {e}")
-                            continue
-                
-                logger.info(f"Successfully parsed {len(frames)} frames from {total_lines} lines")
-                return frames
-                
-            except requests.exceptions.Timeout:
-                logger.warning(f"Timeout on attempt {attempt + 1}/{self.max_retries}")
+        try:
+            started = time.perf_counter()
+            path = None
+            for attempt in range(self.max_retries):
+                # Only one worker process downloads a recording; the others wait and reuse its file.
+                # The lock is held per attempt, so they are not blocked through the backoff.
+                with file_lock(self.get_lock_path(game_id, recording_id)):
+                    cached_path = self._cached_path(game_id, recording_id)
+                    if cached_path:
+                        progress.path = cached_path
+                        progress.error = None
+                        return cached_path
+                    progress.attempt = attempt + 1
+                    path = self._download_attempt(url, filepath, progress, progress_callback)
+                    if path:
+                        self.cache.record(game_id, recording_id, frames=progress.frames)
+                        break
                 if attempt < self.max_retries - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
-                continue
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Request error on attempt {attempt + 1}/{self.max_retries}: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(2 ** attempt)
-                continue
+            FETCH_SECONDS.observe(time.perf_counter() - started, outcome='success' if path else 'failure')
+            if not path:
+                progress.done = True
+                progress.finished_at = time.time()
+                if progress_callback:
+                    progress_callback(progress)
+                logger.error(f"Failed to download recording after {self.max_retries} attempts")
+                return None
+            DOWNLOAD_BYTES.observe(progress.bytes_downloaded)
+            self.summarize_later(game_id, recording_id)
+            self.cache.enforce_limits(keep=filepath.name)
+            return path
+        finally:
+            progress.done = True
+            progress.finished_at = progress.finished_at or time.time()
+            progress.frames_ready.set()
+            progress.finished.set()
+    
+    def _download_attempt(self, url: str, filepath: Path, progress: DownloadProgress,
+                          progress_callback: Optional[Callable[[DownloadProgress], None]]) -> Optional[str]:
+        """One download of ``url`` into ``filepath``; returns None (with ``progress.error`` set) on failure"""
+        progress.bytes_downloaded = 0
+        progress.frames = 0
+        temp_path = None
+        grid_writer = None
+        try:
+            logger.info(f"Downloading recording from: {url} (attempt {progress.attempt}/{self.max_retries})")
+            
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                content_length = response.headers.get('Content-Length')
+                # Content-Length is the encoded size when the body is compressed
+                if content_length and not response.headers.get('Content-Encoding'):
+                    progress.total_bytes = int(content_length)
                 
-            except Exception as e:
-                logger.error(f"Unexpected error on attempt {attempt + 1}/{self.max_retries}: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(2 ** attempt)
-                continue
+                grid_writer = GridStoreWriter(self.get_grid_path(str(filepath)))
+                builder = FrameIndexBuilder(grid_writer.add)
+                fd, temp_path = tempfile.mkstemp(dir=self.storage_dir, prefix=filepath.name + '.', suffix='.part')
+                progress.partial_path = temp_path
+                progress.builder = builder
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        # Flush before indexing so every indexed frame is readable from the partial file
+                        f.flush()
+                        builder.feed(chunk)
+                        progress.bytes_downloaded += len(chunk)
+                        DOWNLOADED_BYTES_TOTAL.inc(len(chunk))
+                        progress.frames = len(builder.lengths)
+                        if progress.frames:
+                            progress.frames_ready.set()
+                        if progress_callback:
+                            progress_callback(progress)
+                builder.finish()
+            
+            if not builder.offsets:
+                raise ValueError("Recording contains no valid frames")
+            
+            # Readers switch to the final path once it is set; the partial name stops existing at the rename
+            progress.path = str(filepath)
+            os.replace(temp_path, filepath)
+            temp_path = None
+            write_frame_index(self.get_index_path(str(filepath)), str(filepath), builder.offsets, builder.lengths)
+            grid_writer.close(str(filepath))
+            grid_writer = None
+            
+            progress.frames = len(builder.lengths)
+            progress.error = None
+            progress.done = True
+            progress.finished_at = time.time()
+            if progress_callback:
+                progress_callback(progress)
+            logger.info(f"Downloaded recording to: {filepath} ({progress.frames} frames, {progress.bytes_downloaded} bytes)")
+            return str(filepath)
+            
+        except requests.exceptions.Timeout:
+            logger.warning(f"Timeout on attempt {progress.attempt}/{self.max_retries}")
+            progress.error = "Timeout"
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request error on attempt {progress.attempt}/{self.max_retries}: {e}")
+            progress.error = str(e)
+            
+        except Exception as e:
+            logger.error(f"Unexpected error on attempt {progress.attempt}/{self.max_retries}: {e}")
+            progress.error = str(e)
         
-        logger.error(f"Failed to fetch recording after {self.max_retries} attempts")
+        finally:
+            if grid_writer:
+                grid_writer.abort()
+            if temp_path:
+                if progress.path == str(filepath):
+                    progress.path = None
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
         return None
     
+    def _claim_download(self, game_id: str, recording_id: str) -> Tuple[DownloadProgress, bool]:
+        """Return ``(progress, owner)``; only the owner performs the download, others wait on it"""
+        key = f"{game_id}/{recording_id}"
+        with self._progress_lock:
+            progress = self.progress.get(key)
+            if progress is not None and not progress.done:
+                return progress, False
+            self._prune_progress()
+            progress = DownloadProgress(game_id, recording_id)
+            self.progress[key] = progress
+            return progress, True
+    
+    def start_download(self, game_id: str, recording_id: str) -> DownloadProgress:
+        """Download a recording in a background thread, reusing a download already in flight"""
+        progress, owner = self._claim_download(game_id, recording_id)
+        if not owner:
+            return progress
+        
+        thread = threading.Thread(target=self.download_recording, args=(game_id, recording_id),
+                                  kwargs={"progress": progress}, daemon=True,
+                                  name=f"download-{recording_id}")
+        thread.start()
+        return progress
+    
+    def get_progress(self, game_id: str, recording_id: str) -> Optional[Dict]:
+        """Return the progress of the latest download of a recording, if any"""
+        with self._progress_lock:
+            progress = self.progress.get(f"{game_id}/{recording_id}")
+        return progress.to_dict() if progress else None
+    
+    def _prune_progress(self, max_age: float = 3600) -> None:
+        """Forget downloads that finished long ago (caller holds the progress lock)"""
+        now = time.time()
+        for key in [k for k, p in self.progress.items() if p.done and now - (p.finished_at or now) > max_age]:
+            del self.progress[key]
+    
     def save_recording(self, game_id: str, recording_id: str, frames: List[Dict]) -> str:
         """Save recording data to local file"""
         filename = f"{game_id}-{recording_id}.jsonl"
         filepath = self.storage_dir / filename
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                for frame in frames:
-                    f.write(json.dumps(frame) + '\n')
-            
-            
+            with file_lock(self.get_lock_path(game_id, recording_id)):
+                frame_count = self._write_recording(filepath, frames)
+                self.cache.record(game_id, recording_id, frames=frame_count)
+                self._index_frames(game_id, recording_id, frames)
+            self.cache.enforce_limits(keep=filename)
             logger.info(f"Saved recording to: {filepath} ({len(frames)} frames)")
             return str(filepath)
             
@@ -92,18 +359,162 @@ class RecordingFetcher:
             logger.error(f"Error saving recording: {e}")
             raise
     
+    def _index_frames(self, game_id: str, recording_id: str, frames: Iterable[Dict]) -> Dict:
+        """Build and store the summary and search rows of a recording from its frames, in one pass"""
+        builder = RecordingSummaryBuilder()
+        rows = []
+        for frame in frames:
+            if is_valid_frame(frame):
+                rows.append(frame_row(builder.frames, frame))
+                builder.add(frame)
+        summary = builder.to_dict()
+        self.cache.set_summary(game_id, recording_id, summary, builder.thumbnail())
+        self.search.replace(game_id, recording_id, rows)
+        return summary
+    
+    def summarize(self, game_id: str, recording_id: str) -> Optional[Dict]:
+        """Compute and store the summary and search rows of a cached recording"""
+        try:
+            with file_lock(self.get_lock_path(game_id, recording_id)):
+                filepath = self.storage_dir / recording_filename(game_id, recording_id)
+                if not filepath.exists():
+                    return None
+                return self._index_frames(game_id, recording_id, iter_recording_frames(str(filepath)))
+        except Exception as e:
+            logger.warning(f"Could not summarize {game_id}/{recording_id}: {e}")
+            return None
+    
+    def summarize_later(self, game_id: str, recording_id: str) -> None:
+        with self._summary_lock:
+            if self._summary_executor is None or self._summary_pid != os.getpid():
+                self._summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='summary')
+                self._summary_pid = os.getpid()
+            executor = self._summary_executor
+        executor.submit(self.summarize, game_id, recording_id)
+    
+    def backfill_indexes(self) -> int:
+        """Queue cached recordings that predate summaries or search; returns how many were queued"""
+        entries = self.cache.entries()
+        indexed = self.search.indexed_names()
+        for name in indexed - {entry['name'] for entry in entries}:
+            self.search.forget(name)
+        missing = [entry for entry in entries if not entry['compressed']
+                   and (entry['summary'] is None or entry['name'] not in indexed)]
+        for entry in missing:
+            self.summarize_later(entry['game_id'], entry['recording_id'])
+        if missing:
+            logger.info(f"Indexing {len(missing)} cached recordings in the background")
+        return len(missing)
+    
+    def _write_recording(self, filepath: Path, frames: List[Dict]) -> int:
+        """Write frames, their index and grid store, renaming the file into place; returns the frame count"""
+        filename = filepath.name
+        # Record byte offsets while writing so frames can be read without parsing the whole file
+        offsets = []
+        lengths = []
+        offset = 0
+        grid_writer = GridStoreWriter(self.get_grid_path(str(filepath)))
+        fd, temp_path = tempfile.mkstemp(dir=self.storage_dir, prefix=filename + '.', suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for frame in frames:
+                    line = dumps(frame) + b'\n'
+                    if is_valid_frame(frame):
+                        offsets.append(offset)
+                        lengths.append(len(line))
+                        grid_writer.add(frame['data']['frame'])
+                    f.write(line)
+                    offset += len(line)
+            os.replace(temp_path, filepath)
+        except Exception:
+            grid_writer.abort()
+            os.unlink(temp_path)
+            raise
+        
+        write_frame_index(self.get_index_path(str(filepath)), str(filepath), offsets, lengths)
+        grid_writer.close(str(filepath))
+        return len(offsets)
+    
+    def get_index_path(self, filepath: str, suffix: str = '.idx') -> str:
+        """Sidecar frame index location for a recording file.
+        
+        Cached recordings keep their index next to the file; indexes for files
+        elsewhere live under ``storage_dir/index`` so foreign directories are untouched.
+        """
+        path = Path(filepath).resolve()
+        if path.parent == self.storage_dir.resolve():
+            return str(path) + suffix
+        digest = hashlib.sha1(str(path).encode('utf-8')).hexdigest()
+        return str(self.storage_dir / 'index' / f"{digest}{suffix}")
+    
+    def get_grid_path(self, filepath: str) -> str:
+        """Sidecar packed grid store location for a recording file"""
+        return self.get_index_path(filepath, suffix='.grids')
+    
+    def get_decompressed_path(self, filepath: str) -> str:
+        """Plain working copy of a ``.jsonl.gz``/``.jsonl.zst`` recording, made once per version of the file.
+        
+        Frames are read by byte offset, which needs the uncompressed bytes on disk;
+        the copy is streamed so memory use does not depend on the recording size.
+        """
+        path = Path(filepath).resolve()
+        stat = path.stat()
+        digest = hashlib.sha1(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode('utf-8')).hexdigest()
+        target = self.storage_dir / 'decompressed' / f"{digest}.jsonl"
+        if target.exists():
+            return str(target)
+        
+        target.parent.mkdir(exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=target.parent, suffix='.part')
+        os.close(fd)
+        try:
+            decompress_file(str(path), temp_path)
+            os.replace(temp_path, target)
+        except Exception:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        logger.info(f"Decompressed {filepath} to {target}")
+        return str(target)
+    
+    def get_lock_path(self, game_id: str, recording_id: str) -> str:
+        """Lock file serialising downloads and saves of a recording across workers"""
+        return str(self.storage_dir / 'locks' / f"{game_id}-{recording_id}.lock")
+    
     def get_cached_recording(self, game_id: str, recording_id: str) -> Optional[str]:
         """Check if recording is already cached locally"""
-        filename = f"{game_id}-{recording_id}.jsonl"
-        filepath = self.storage_dir / filename
+        if self.cache.is_compressed(game_id, recording_id):
+            with file_lock(self.get_lock_path(game_id, recording_id)):
+                path = self._cached_path(game_id, recording_id)
+            DISK_CACHE_LOOKUPS.inc(result='restored' if path else 'miss')
+            return path
+        path = self._cached_path(game_id, recording_id)
+        DISK_CACHE_LOOKUPS.inc(result='hit' if path else 'miss')
+        return path
+    
+    def is_cached(self, game_id: str, recording_id: str) -> bool:
+        """Whether a recording is in the cache, without restoring it if it is compressed"""
+        filepath = self.storage_dir / recording_filename(game_id, recording_id)
+        return filepath.exists() or self.cache.is_compressed(game_id, recording_id)
+    
+    def _cached_path(self, game_id: str, recording_id: str) -> Optional[str]:
+        """Cached file of a recording, restoring it if it was compressed (caller holds the lock for that)"""
+        filepath = self.storage_dir / recording_filename(game_id, recording_id)
         
         if filepath.exists():
             logger.info(f"Found cached recording: {filepath}")
+            self.cache.touch(game_id, recording_id)
             return str(filepath)
         
+        if self.cache.is_compressed(game_id, recording_id):
+            return self.cache.decompress(game_id, recording_id)
+        
         return None
     
-    def fetch_and_cache_recording(self, game_id: str, recording_id: str) -> Optional[str]:
+    def fetch_and_cache_recording(self, game_id: str, recording_id: str,
+                                  progress_callback: Optional[Callable[[DownloadProgress], None]] = None) -> Optional[str]:
         """Fetch recording from API and cache it locally"""
         start_time = datetime.now()
         
@@ -112,9 +523,9 @@ class RecordingFetcher:
             if cached_path:
                 return cached_path
             
-            frames = self.fetch_recording(game_id, recording_id)
-            if frames:
-                result_path = self.save_recording(game_id, recording_id, frames)
+            # download_recording waits for a download of the same recording already in flight
+            result_path = self.download_recording(game_id, recording_id, progress_callback)
+            if result_path:
                 load_time = datetime.now() - start_time
                 logger.info(f"Recording fetched and cached in {load_time.total_seconds():.2f}s")
                 return result_path
@@ -126,26 +537,20 @@ class RecordingFetcher:
             return None
     
     def list_cached_recordings(self) -> List[Dict]:
-        """List all cached recordings"""
-        recordings = []
-        
-        for filepath in self.storage_dir.glob("*.jsonl"):
-            try:
-                stat = filepath.stat()
-                recordings.append({
-                    "name": filepath.name,
-                    "path": str(filepath),
-                    "size": stat.st_size,
-                    "modified": stat.st_mtime,
-                    "game_id": filepath.stem.split('-')[0],
-                    "recording_id": '-'.join(filepath.stem.split('-')[1:])
-                })
-            except Exception as e:
-                logger.warning(f"Error reading file {filepath}: {e}")
-        
-        # Sort by modification time (newest first)
-        recordings.sort(key=lambda x: x['modified'], reverse=True)
-        return recordings
+        """List all cached recordings (newest first) from the cache manifest"""
+        return [{
+            "name": entry["name"],
+            "path": str(self.storage_dir / entry["name"]),
+            "size": entry["size"],
+            "modified": entry["modified"],
+            "last_access": entry["last_access"],
+            "frames": entry["frames"],
+            "compressed": bool(entry["compressed"]),
+            "game_id": entry["game_id"],
+            "recording_id": entry["recording_id"],
+            "summary": entry["summary"],
+            "has_thumbnail": bool(entry["has_thumbnail"]),
+        } for entry in self.cache.entries()]
 
 # Example usage
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+"""Render frame grids to images for thumbnails, embeds and clients that should not draw the grid.
+
+PNG is encoded here without dependencies: grids hold palette indices 0-15, so a
+frame maps directly onto a 4-bit indexed PNG whose rows are built with slice
+assignment and the nibble packing of grid_store. WebP needs the optional Pillow package.
+"""
+import io
+import zlib
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from grid_store import pack_cells
+
+try:
+    from PIL import Image
+except ImportError:  # optional dependency
+    Image = None
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+MIMETYPES = {'png': 'image/png', 'webp': 'image/webp'}
+PALETTE_SIZE = 16
+
+
+def available_formats() -> List[str]:
+    """Image formats that can be rendered in this environment"""
+    formats = ['png']
+    if Image is not None and 'WEBP' in Image.SAVE:
+        formats.append('webp')
+    return formats
+
+
+def palette_from_color_map(color_map: Dict) -> Tuple[bytes, bytes]:
+    """RGB and alpha bytes of the 16 palette entries from ``{value: ("#RRGGBBAA", name)}``"""
+    rgb = bytearray()
+    alpha = bytearray()
+    for value in range(PALETTE_SIZE):
+        color = color_map.get(value, ("#000000FF",))[0].lstrip('#')
+        rgb += bytes.fromhex(color[:6])
+        alpha.append(int(color[6:8], 16) if len(color) >= 8 else 255)
+    return bytes(rgb), bytes(alpha)
+
+
+def scaled_rows(cells: bytes, height: int, width: int, scale: int):
+    """Yield each grid row widened ``scale`` times (one byte per pixel); callers repeat it vertically"""
+    row_out = bytearray(width * scale)
+    for r in range(height):
+        row = cells[r * width:(r + 1) * width]
+        for k in range(scale):
+            row_out[k::scale] = row
+        yield bytes(row_out)
+
+
+def png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def png_header_chunks(height: int, width: int, palette: Tuple[bytes, bytes]) -> List[bytes]:
+    """IHDR, PLTE and (when needed) tRNS chunks of a 4-bit indexed image of ``height`` x ``width`` pixels"""
+    rgb, alpha = palette
+    chunks = [png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 4, 3, 0, 0, 0)), png_chunk(b'PLTE', rgb)]
+    if alpha.count(255) != len(alpha):
+        chunks.append(png_chunk(b'tRNS', alpha))
+    return chunks
+
+
+def png_image_data(cells: bytes, height: int, width: int, scale: int = 1, compress_level: int = 6) -> bytes:
+    """Compressed 4-bit pixel rows of a grid, the payload of IDAT (or APNG fdAT) chunks"""
+    lines = []
+    for row in scaled_rows(cells, height, width, scale):
+        # Filter type 0 (none) then the row packed two pixels per byte
+        lines.append((b'\x00' + pack_cells(row)) * scale)
+    return zlib.compress(b''.join(lines), compress_level)
+
+
+def render_png(cells: bytes, height: int, width: int, palette: Tuple[bytes, bytes], scale: int = 1,
+               compress_level: int = 6) -> bytes:
+    """4-bit indexed PNG of a single-layer grid given as one byte per cell"""
+    chunks = png_header_chunks(height * scale, width * scale, palette)
+    chunks.append(png_chunk(b'IDAT', png_image_data(cells, height, width, scale, compress_level)))
+    chunks.append(png_chunk(b'IEND', b''))
+    return PNG_SIGNATURE + b''.join(chunks)
+
+
+def render_webp(cells: bytes, height: int, width: int, palette: Tuple[bytes, bytes], scale: int = 1) -> bytes:
+    """Lossless WebP of a single-layer grid (requires Pillow)"""
+    if Image is None:
+        raise RuntimeError("WebP rendering requires the Pillow package")
+    pixels = b''.join(row * scale for row in scaled_rows(cells, height, width, scale))
+    image = Image.frombytes('P', (width * scale, height * scale), pixels)
+    image.putpalette(palette[0])
+    out = io.BytesIO()
+    image.save(out, format='WEBP', lossless=True)
+    return out.getvalue()
+
+
+def render_image(cells: bytes, height: int, width: int, palette: Tuple[bytes, bytes], scale: int = 1,
+                 image_format: str = 'png') -> bytes:
+    if image_format == 'webp':
+        return render_webp(cells, height, width, palette, scale)
+    return render_png(cells, height, width, palette, scale)
+
+
+class RenderedFrameCache:
+    """LRU cache of rendered images keyed by recording, frame, layer, scale and format.
+
+    Keys name immutable content (see make_recording_key in app.py), so entries
+    never go stale; the oldest are evicted once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous)
+            self._entries[key] = body
+            self.total_bytes += len(body)
+            while self.total_bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self.total_bytes -= len(old)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "total_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class _SessionEntry:
+    __slots__ = ("value", "last_access")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.last_access = time.monotonic()
+
+
+class ReplaySessionStore:
+    """Session-keyed store of replay state with LRU/TTL eviction and a memory cap.
+
+    Values are created through ``factory(session_id)`` and may expose an
+    ``estimated_bytes`` attribute which is used for the memory cap.
+    """
+
+    def __init__(self, factory: Callable[[str], Any], max_sessions: int = 256,
+                 ttl_seconds: float = 1800, max_memory_bytes: int = 512 * 1024 * 1024):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self._sessions: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_session_id() -> str:
+        return str(uuid.uuid4())
+
+    def get(self, session_id: Optional[str]) -> Optional[Any]:
+        """Return the value for a session (refreshing its LRU position) or None"""
+        if not session_id:
+            return None
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if self._is_expired(entry, time.monotonic()):
+                del self._sessions[session_id]
+                return None
+            entry.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return entry.value
+
+    def get_or_create(self, session_id: Optional[str]) -> Tuple[str, Any]:
+        """Return ``(session_id, value)``, creating a new session when needed"""
+        value = self.get(session_id)
+        if value is not None:
+            return session_id, value
+
+        if not session_id:
+            session_id = self.new_session_id()
+        value = self.factory(session_id)
+        with self._lock:
+            # Another thread may have created the same session meanwhile
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                existing.last_access = time.monotonic()
+                self._sessions.move_to_end(session_id)
+                return session_id, existing.value
+            self._sessions[session_id] = _SessionEntry(value)
+            self._evict_locked(keep=session_id)
+        return session_id, value
+
+    def enforce_limits(self, keep: Optional[str] = None) -> None:
+        """Evict sessions after a value grew (e.g. a recording was loaded)"""
+        with self._lock:
+            self._evict_locked(keep=keep)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active_sessions": len(self._sessions),
+                "estimated_bytes": self._total_bytes_locked(),
+                "max_sessions": self.max_sessions,
+                "max_memory_bytes": self.max_memory_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def _is_expired(self, entry: _SessionEntry, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry.last_access > self.ttl_seconds
+
+    def _total_bytes_locked(self) -> int:
+        return sum(getattr(e.value, "estimated_bytes", 0) for e in self._sessions.values())
+
+    def _evict_locked(self, keep: Optional[str] = None) -> None:
+        now = time.monotonic()
+        expired = [sid for sid, e in self._sessions.items() if self._is_expired(e, now) and sid != keep]
+        for sid in expired:
+            del self._sessions[sid]
+        if expired:
+            logger.info(f"Evicted {len(expired)} expired replay sessions")
+
+        # Least recently used sessions sit at the front of the OrderedDict
+        while len(self._sessions) > self.max_sessions:
+            if not self._pop_oldest_locked(keep):
+                break
+
+        total = self._total_bytes_locked()
+        while total > self.max_memory_bytes and len(self._sessions) > 1:
+            evicted = self._pop_oldest_locked(keep)
+            if evicted is None:
+                break
+            total -= getattr(evicted.value, "estimated_bytes", 0)
+
+    def _pop_oldest_locked(self, keep: Optional[str]) -> Optional[_SessionEntry]:
+        for sid in self._sessions:
+            if sid != keep:
+                logger.info(f"Evicting replay session {sid}")
+                return self._sessions.pop(sid)
+        return None
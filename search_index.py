@@ -0,0 +1,185 @@
+"""Search across cached recordings by frame state, score, action and reasoning text.
+
+Rows are written once per recording when it is cached (in the same pass that
+builds its summary) into ``search.sqlite3`` next to the cache manifest. Reasoning
+text is indexed with SQLite FTS5 when the SQLite build has it, otherwise it is
+matched with LIKE.
+"""
+import sqlite3
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from cache_manager import recording_filename
+from summary import action_name
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DB_NAME = "search.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    game_id TEXT NOT NULL,
+    recording_id TEXT NOT NULL,
+    frame INTEGER NOT NULL,
+    state TEXT,
+    score INTEGER,
+    action TEXT,
+    reasoning TEXT,
+    UNIQUE (name, frame)
+);
+CREATE INDEX IF NOT EXISTS frames_state_score ON frames (state, score);
+CREATE INDEX IF NOT EXISTS frames_action ON frames (action);
+CREATE INDEX IF NOT EXISTS frames_game ON frames (game_id);
+CREATE TABLE IF NOT EXISTS indexed (
+    name TEXT PRIMARY KEY,
+    frames INTEGER NOT NULL
+);
+"""
+
+# External-content FTS table kept in step with frames by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reasoning_fts USING fts5(reasoning, content='frames', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS frames_ai AFTER INSERT ON frames BEGIN
+    INSERT INTO reasoning_fts (rowid, reasoning) VALUES (new.id, new.reasoning);
+END;
+CREATE TRIGGER IF NOT EXISTS frames_ad AFTER DELETE ON frames BEGIN
+    INSERT INTO reasoning_fts (reasoning_fts, rowid, reasoning) VALUES ('delete', old.id, old.reasoning);
+END;
+"""
+
+# (frame, state, score, action, reasoning)
+FrameRow = Tuple[int, Optional[str], Optional[int], Optional[str], Optional[str]]
+# Reasoning fields that label the frame rather than hold reasoning text
+REASONING_LABELS = {'agent_type', 'model', 'action_chosen'}
+
+
+def reasoning_text(reasoning) -> str:
+    """Text of a reasoning record, whose shape depends on the agent"""
+    if isinstance(reasoning, str):
+        return reasoning
+    if isinstance(reasoning, dict):
+        return ' '.join(filter(None, (reasoning_text(value) for key, value in reasoning.items()
+                                      if key not in REASONING_LABELS)))
+    if isinstance(reasoning, list):
+        return ' '.join(filter(None, (reasoning_text(value) for value in reasoning)))
+    return ''
+
+
+def frame_row(frame_index: int, frame: Dict) -> FrameRow:
+    """Searchable fields of one frame"""
+    data = frame.get('data', {})
+    action_input = data.get('action_input') or {}
+    if not isinstance(action_input, dict):
+        action_input = {}
+    text = reasoning_text(action_input.get('reasoning'))
+    score = data.get('score')
+    return (frame_index, data.get('state'), score if isinstance(score, (int, float)) else None,
+            action_name(action_input), text or None)
+
+
+def fts_query(text: str) -> str:
+    """Quote each word so user input is matched literally rather than parsed as FTS syntax"""
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def like_pattern(text: str) -> str:
+    """LIKE pattern (with ESCAPE '\\') matching ``text`` literally anywhere in a value"""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+
+class SearchIndex:
+    """Per-frame search rows of every cached recording"""
+
+    def __init__(self, storage_dir):
+        self.path = Path(storage_dir) / SEARCH_DB_NAME
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError as e:
+                logger.warning(f"SQLite FTS5 is not available ({e}); reasoning search falls back to LIKE")
+                self.fts = False
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def replace(self, game_id: str, recording_id: str, rows: Iterable[FrameRow]) -> int:
+        """Replace the rows of a recording; returns the number of frames indexed"""
+        name = recording_filename(game_id, recording_id)
+        rows = [(name, game_id, recording_id) + tuple(row) for row in rows]
+        with self._connect() as conn:
+            conn.execute("DELETE FROM frames WHERE name = ?", (name,))
+            conn.executemany("INSERT INTO frames (name, game_id, recording_id, frame, state, score, action, "
+                             "reasoning) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO indexed (name, frames) VALUES (?, ?)", (name, len(rows)))
+        return len(rows)
+
+    def forget(self, name: str) -> None:
+        """Drop the rows of a recording file (evicted, rewritten or gone from disk)"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM frames WHERE name = ?", (name,))
+            conn.execute("DELETE FROM indexed WHERE name = ?", (name,))
+
+    def indexed_names(self) -> set:
+        with self._connect() as conn:
+            return {row['name'] for row in conn.execute("SELECT name FROM indexed")}
+
+    def search(self, text: Optional[str] = None, state: Optional[str] = None, score: Optional[int] = None,
+               min_score: Optional[int] = None, max_score: Optional[int] = None, action: Optional[str] = None,
+               game_id: Optional[str] = None, by_recording: bool = False, limit: int = 50,
+               offset: int = 0) -> List[Dict]:
+        """Matching frames (or, with ``by_recording``, the first match and match count per recording)"""
+        conditions, params = [], []
+        for column, value in (('f.state', state), ('f.score', score), ('f.action', action),
+                              ('f.game_id', game_id)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if min_score is not None:
+            conditions.append("f.score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            conditions.append("f.score <= ?")
+            params.append(max_score)
+
+        source = "frames f"
+        snippet = "substr(f.reasoning, 1, 200)"
+        if text and self.fts:
+            source = "reasoning_fts JOIN frames f ON f.id = reasoning_fts.rowid"
+            conditions.append("reasoning_fts MATCH ?")
+            params.append(fts_query(text))
+            snippet = "snippet(reasoning_fts, 0, '[', ']', '…', 16)"
+        elif text:
+            conditions.append("f.reasoning LIKE ? ESCAPE '\\'")
+            params.append(like_pattern(text))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        if by_recording:
+            sql = (f"SELECT f.game_id, f.recording_id, MIN(f.frame) AS frame, COUNT(*) AS matches "
+                   f"FROM {source} {where} GROUP BY f.name ORDER BY f.name LIMIT ? OFFSET ?")
+        else:
+            sql = (f"SELECT f.game_id, f.recording_id, f.frame, f.state, f.score, f.action, {snippet} AS snippet "
+                   f"FROM {source} {where} ORDER BY f.name, f.frame LIMIT ? OFFSET ?")
+        with self._connect() as conn:
+            rows = conn.execute(sql, params + [limit, offset]).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*) AS recordings, COALESCE(SUM(frames), 0) AS frames "
+                               "FROM indexed").fetchone()
+        return {"recordings": row['recordings'], "frames": row['frames'], "fts": self.fts}
@@ -0,0 +1,75 @@
+import os
+import json
+import logging
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('orjson', 'msgspec', 'json')
+# Preference order for 'auto'; measured with benchmarks/bench_serializer.py on recording-shaped
+# frames, orjson decodes fastest and msgspec encodes fastest (orjson needs OPT_NON_STR_KEYS here)
+DECODE_PREFERENCE = ('orjson', 'msgspec', 'json')
+ENCODE_PREFERENCE = ('msgspec', 'orjson', 'json')
+
+
+def available_backends(order=BACKENDS):
+    return [name for name in order
+            if name == 'json' or (name == 'orjson' and orjson is not None)
+            or (name == 'msgspec' and msgspec is not None)]
+
+
+if msgspec is not None:
+    _msgspec_decoder = msgspec.json.Decoder()
+    _msgspec_encoder = msgspec.json.Encoder()
+
+
+class Serializer:
+    """JSON encoding and decoding through the fastest installed library.
+
+    ``orjson`` and ``msgspec`` are optional; ``json`` from the standard library is
+    always available. ``auto`` picks the fastest installed library separately for
+    decoding and encoding. All backends accept bytes or str and produce UTF-8 bytes.
+    """
+
+    def __init__(self, backend: str = 'auto'):
+        if backend != 'auto' and backend not in available_backends():
+            logger.warning(f"JSON backend {backend!r} is not installed; using the fastest available")
+            backend = 'auto'
+        if backend == 'auto':
+            self.decode_backend = available_backends(DECODE_PREFERENCE)[0]
+            self.encode_backend = available_backends(ENCODE_PREFERENCE)[0]
+        else:
+            self.decode_backend = self.encode_backend = backend
+        self.backend = backend
+
+        if self.decode_backend == 'orjson':
+            self.loads = orjson.loads
+        elif self.decode_backend == 'msgspec':
+            self.loads = _msgspec_decoder.decode
+        else:
+            self.loads = json.loads
+
+        if self.encode_backend == 'orjson':
+            # Color maps and other dicts use int keys, which orjson rejects by default
+            self.dumps = lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        elif self.encode_backend == 'msgspec':
+            self.dumps = _msgspec_encoder.encode
+        else:
+            self.dumps = lambda obj: json.dumps(obj).encode('utf-8')
+
+
+# Process-wide serializer, chosen with the JSON_BACKEND environment variable
+serializer = Serializer(os.getenv('JSON_BACKEND', 'auto'))
+logger.info(f"Decoding JSON with {serializer.decode_backend}, encoding with {serializer.encode_backend}")
+
+loads = serializer.loads
+dumps = serializer.dumps
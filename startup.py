@@ -0,0 +1,152 @@
+"""Worker startup in stages: build the shared components, warm the caches, report ready.
+
+Liveness only needs the process to answer requests. Readiness also waits for the
+fetcher and caches to exist and for the warm-up recordings to be cached and
+opened (or for ``warm_timeout`` to pass), so an autoscaled instance takes
+traffic once it can serve replays quickly.
+"""
+import os
+import time
+import threading
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+from bulk_prefetch import PrefetchJob, parse_recording_ref, read_refs
+
+logger = logging.getLogger(__name__)
+
+# Startup states, in the order startup moves through them
+STARTING = "starting"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+def warm_refs(recordings: str = '', path: str = '', default: Optional[str] = None) -> List[str]:
+    """Valid recording references from a comma or whitespace separated list plus a list file.
+
+    The word ``default`` in the list stands for the ``default`` reference (the recording the UI opens).
+    """
+    refs = recordings.replace(',', ' ').split()
+    if path:
+        with open(path) as f:
+            refs.extend(read_refs(f))
+    valid = []
+    for ref in refs:
+        if ref == 'default' and default:
+            ref = default
+        try:
+            parse_recording_ref(ref)
+        except ValueError as e:
+            logger.warning(f"Skipping warm-up recording: {e}")
+            continue
+        valid.append(ref)
+    return valid
+
+
+class Startup:
+    """Build shared components with ``initialize``, then warm ``refs`` in the background.
+
+    ``initialize`` returns the RecordingFetcher the warm-up downloads with;
+    ``open_recording(game_id, recording_id)`` loads a cached recording into the
+    in-memory caches. Requests that need the components wait on ``initialized``.
+    """
+
+    def __init__(self, initialize: Callable, open_recording: Optional[Callable[[str, str], None]] = None,
+                 refs: Iterable = (), warm_workers: int = 4, warm_timeout: float = 120):
+        self.initialize = initialize
+        self.open_recording = open_recording
+        self.refs = list(refs)
+        self.warm_workers = warm_workers
+        self.warm_timeout = warm_timeout
+        self.state = STARTING
+        self.error = None
+        self.fetcher = None
+        self.warm_job: Optional[PrefetchJob] = None
+        self.started_at = None
+        self.initialized_at = None
+        self.ready_at = None
+        self.initialized = threading.Event()
+        self.ready = threading.Event()
+        self._warmed = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self, background: bool = False) -> 'Startup':
+        """Build the components here or in a background thread; warm-up always runs in the background"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return self
+            self._pid = os.getpid()
+        if background:
+            threading.Thread(target=self.run, daemon=True, name='startup').start()
+        else:
+            self.run()
+        return self
+
+    def ensure_running(self) -> None:
+        """Restart unfinished startup in a forked worker, whose copy of the startup threads is gone"""
+        if self._pid != os.getpid() and not self.ready.is_set() and self.state != FAILED:
+            logger.info(f"Resuming startup in worker {os.getpid()}")
+            self.start(background=True)
+
+    def run(self) -> None:
+        self.started_at = time.time()
+        if not self.initialized.is_set():
+            try:
+                self.fetcher = self.initialize()
+            except Exception as e:
+                logger.error(f"Startup failed: {e}")
+                self.error = str(e)
+                self.state = FAILED
+                self.initialized.set()
+                return
+            self.initialized_at = time.time()
+            self.initialized.set()
+            logger.info(f"Components ready in {self.initialized_at - self.started_at:.2f}s")
+
+        if self.refs:
+            self.state = WARMING
+            threading.Thread(target=self._warm, daemon=True, name='warm').start()
+            threading.Thread(target=self._await_warm, daemon=True, name='warm-timeout').start()
+        else:
+            self._mark_ready()
+
+    def _mark_ready(self) -> None:
+        self.state = READY
+        self.ready_at = time.time()
+        self.ready.set()
+
+    def _await_warm(self) -> None:
+        if not self._warmed.wait(self.warm_timeout):
+            logger.warning(f"Warm-up still running after {self.warm_timeout}s; reporting ready")
+        self._mark_ready()
+
+    def _warm(self) -> None:
+        try:
+            self.warm_job = PrefetchJob(self.fetcher, self.refs, max_workers=self.warm_workers)
+            self.warm_job.run()
+            if self.open_recording is not None:
+                for item in self.warm_job.items:
+                    if item.path:
+                        self.open_recording(item.game_id, item.recording_id)
+            logger.info(f"Warmed {len(self.warm_job.items)} recordings: {self.warm_job.counts()}")
+        except Exception as e:
+            logger.error(f"Error warming recordings: {e}")
+        finally:
+            self._warmed.set()
+
+    def to_dict(self) -> Dict:
+        started = self.started_at
+        return {
+            "state": self.state,
+            "ready": self.ready.is_set(),
+            "error": self.error,
+            "initialize_seconds": round(self.initialized_at - started, 3) if self.initialized_at else None,
+            "ready_seconds": round(self.ready_at - started, 3) if self.ready_at else None,
+            "warm": {
+                "recordings": len(self.refs),
+                "done": self._warmed.is_set(),
+                "counts": self.warm_job.counts() if self.warm_job else None,
+            },
+        }
@@ -0,0 +1,117 @@
+"""Per-recording summaries computed once when a recording is cached.
+
+Summaries are stored in the cache manifest so the recordings list can show what
+happened in each run (outcome, score, actions, agent) without opening the JSONL.
+"""
+import struct
+from collections import Counter
+from typing import Dict, Iterator, Optional, Tuple
+
+from frame_index import is_valid_frame
+from grid_store import encode_grid, pack_cells, unpack_cells
+from serializer import loads
+
+# Thumbnail blobs: height, width, then the cells of one layer packed two per byte
+THUMBNAIL_HEADER = struct.Struct('<HH')
+
+
+def action_name(action_input: Dict) -> Optional[str]:
+    """Action label of a frame: the reasoning's ``action_chosen``, else derived from the action id"""
+    reasoning = action_input.get('reasoning') or {}
+    if isinstance(reasoning, dict) and reasoning.get('action_chosen'):
+        return str(reasoning['action_chosen'])
+    action_id = action_input.get('id')
+    if action_id is None:
+        return None
+    return 'RESET' if action_id == 0 else f"ACTION{action_id}"
+
+
+def pack_thumbnail(height: int, width: int, cells: bytes) -> bytes:
+    return THUMBNAIL_HEADER.pack(height, width) + pack_cells(cells)
+
+
+def unpack_thumbnail(blob: bytes) -> Tuple[int, int, bytes]:
+    """(height, width, one byte per cell) of a thumbnail blob"""
+    height, width = THUMBNAIL_HEADER.unpack_from(blob)
+    return height, width, unpack_cells(blob[THUMBNAIL_HEADER.size:], height * width)
+
+
+class RecordingSummaryBuilder:
+    """Accumulate a summary from frames in recording order"""
+
+    def __init__(self):
+        self.frames = 0
+        self.game_id = None
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.final_state = None
+        self.final_score = None
+        self.max_score = None
+        self.agent_type = None
+        self.model = None
+        self.actions = Counter()
+        self._last_grid = None
+
+    def add(self, frame: Dict) -> None:
+        data = frame['data']
+        self.frames += 1
+        self.game_id = data.get('game_id', self.game_id)
+        timestamp = frame.get('timestamp')
+        if timestamp:
+            self.first_timestamp = self.first_timestamp or timestamp
+            self.last_timestamp = timestamp
+        self.final_state = data.get('state', self.final_state)
+        score = data.get('score')
+        if isinstance(score, (int, float)):
+            self.final_score = score
+            self.max_score = score if self.max_score is None else max(self.max_score, score)
+
+        action_input = data.get('action_input') or {}
+        if isinstance(action_input, dict):
+            name = action_name(action_input)
+            if name:
+                self.actions[name] += 1
+            reasoning = action_input.get('reasoning') or {}
+            if isinstance(reasoning, dict):
+                self.agent_type = self.agent_type or reasoning.get('agent_type')
+                self.model = self.model or reasoning.get('model')
+        self._last_grid = data.get('frame', self._last_grid)
+
+    def to_dict(self) -> Dict:
+        return {
+            "frames": self.frames,
+            "game_id": self.game_id,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "final_state": self.final_state,
+            "final_score": self.final_score,
+            "max_score": self.max_score,
+            "actions": dict(self.actions.most_common()),
+            "agent_type": self.agent_type,
+            "model": self.model,
+        }
+
+    def thumbnail(self) -> Optional[bytes]:
+        """Displayed (last) layer of the final frame as a thumbnail blob"""
+        encoded = encode_grid(self._last_grid) if self._last_grid else None
+        if encoded is None:
+            return None
+        layers, height, width, packed = encoded
+        size = height * width
+        cells = unpack_cells(packed, layers * size)[(layers - 1) * size:]
+        return pack_thumbnail(height, width, cells)
+
+
+def iter_recording_frames(filepath: str) -> Iterator[Dict]:
+    """Decode the valid frames of a JSONL recording in order, skipping bad lines"""
+    with open(filepath, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                frame = loads(line)
+            except ValueError:
+                continue
+            if is_valid_frame(frame):
+                yield frame
@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GAME_ID = 'ft09-16726c5b26ff'
+RECORDING_ID = '1ed47a81-fda5-4524-afd5-751d3ec30479'
+
+
+def make_frames(count: int = 20, size: int = 8):
+    """Recording frames whose displayed grid changes a couple of cells per frame"""
+    grid = [[(row + col) % 16 for col in range(size)] for row in range(size)]
+    frames = []
+    for i in range(count):
+        grid = [row[:] for row in grid]
+        grid[i % size][(i * 3) % size] = i % 16
+        frames.append({"timestamp": "2025-01-01T00:00:00", "data": {
+            "game_id": GAME_ID,
+            "state": "GAME_OVER" if i == count - 1 else "NOT_FINISHED",
+            "score": i // 5,
+            "frame": [grid],
+            "action_input": {"id": i % 6 + 1, "reasoning": {"action_chosen": f"ACTION{i % 6 + 1}"}},
+        }})
+    return frames
+
+
+def recording_body(frames) -> bytes:
+    return ''.join(json.dumps(frame) + '\n' for frame in frames).encode('utf-8')
+
+
+class RecordingServer:
+    """Local stand-in for the recordings API.
+
+    ``fail`` requests answer with ``status``; ``truncate`` requests send half the
+    body and drop the connection; while ``gate`` is clear, responses stop after
+    the first frame (and a little of the second, so clients reading in fixed
+    size chunks get the whole first line).
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.hits = []
+        self.fail = 0
+        self.status = 500
+        self.truncate = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self.first_chunk_sent = threading.Event()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits.append(self.path)
+                if server.fail:
+                    server.fail -= 1
+                    self.send_error(server.status)
+                    return
+                body = server.body
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if server.truncate:
+                    server.truncate -= 1
+                    self.wfile.write(body[:len(body) // 2])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                split = body.index(b'\n') + 64
+                self.wfile.write(body[:split])
+                self.wfile.flush()
+                server.first_chunk_sent.set()
+                server.gate.wait(10)
+                self.wfile.write(body[split:])
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.gate.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def frames():
+    return make_frames()
+
+
+@pytest.fixture
+def recording_server(frames):
+    server = RecordingServer(recording_body(frames))
+    yield server
+    server.close()
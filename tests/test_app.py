@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+from conftest import GAME_ID, RECORDING_ID, make_frames
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    # The app caches recordings relative to the working directory
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('app'))
+    try:
+        import app as app_module
+        app_module.startup.initialized.wait(30)
+        app_module.recording_fetcher.save_recording(GAME_ID, RECORDING_ID, make_frames(20))
+        yield app_module.app.test_client()
+    finally:
+        os.chdir(cwd)
+
+
+def get_frames(client, **params):
+    params = dict({"game_id": GAME_ID, "recording_id": RECORDING_ID}, **params)
+    return client.get('/api/frames', query_string=params)
+
+
+def test_frames_in_range(client):
+    response = get_frames(client, start=5, end=8)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['start'], body['end'], body['total_frames']) == (5, 8, 20)
+    assert [frame['frame_index'] for frame in body['frames']] == [6, 7, 8]
+
+
+def test_frames_end_is_clamped(client):
+    body = get_frames(client, start=15, end=500).get_json()
+    assert (body['start'], body['end']) == (15, 20)
+
+
+@pytest.mark.parametrize('start, end', [(20, 25), (-1, 5), (5, 5), (8, 3)])
+def test_frames_out_of_range(client, start, end):
+    response = get_frames(client, start=start, end=end)
+    assert response.status_code == 400
+    assert 'Invalid frame range' in response.get_json()['error']
+
+
+def test_frames_invalid_recording_id(client):
+    response = get_frames(client, recording_id='not-a-recording')
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid game_id or recording_id"}
+
+
+def test_jsonify_uses_the_serializer(client, monkeypatch):
+    import app as app_module
+    encoded = []
+    monkeypatch.setattr(app_module.serializer, 'dumps', lambda obj: encoded.append(obj) or json.dumps(obj).encode())
+    assert client.get('/api/health').status_code == 200
+    assert encoded and 'streaming' in encoded[-1]
+
+
+def test_export_workers_do_not_start_the_app(tmp_path):
+    # Spawned export workers import app.py as __mp_main__
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = ("import runpy; module = runpy.run_path({!r}, run_name='__mp_main__'); "
+            "assert module['recording_fetcher'] is None; "
+            "assert module['startup'].started_at is None").format(os.path.join(root, 'app.py'))
+    subprocess.run([sys.executable, '-c', code], cwd=tmp_path, check=True, timeout=60,
+                   env=dict(os.environ, PYTHONPATH=root))
+    assert not (tmp_path / 'recordings_cache').exists()
+
+
+def test_streaming_is_off_under_sync_workers(client):
+    assert client.get('/api/health').get_json()['streaming'] is False
+    response = client.get('/api/stream', query_string={"game_id": GAME_ID, "recording_id": RECORDING_ID})
+    assert response.status_code == 503
+
+
+def test_streaming_when_enabled(client, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'streaming_mode', '1')
+    assert client.get('/api/health').get_json()['streaming'] is True
+    params = {"game_id": GAME_ID, "recording_id": RECORDING_ID, "start": 17, "fps": 60}
+    body = client.get('/api/stream', query_string=params).get_data()
+    assert body.count(b'event: frame') == 3
+    assert b'event: end' in body
+
+
+def test_streamed_frames_carry_reasoning(client, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'streaming_mode', '1')
+    params = {"game_id": GAME_ID, "recording_id": RECORDING_ID, "start": 18, "fps": 60, "lean": 1, "reasoning": 1}
+    body = client.get('/api/stream', query_string=params).get_data().decode()
+    events = [json.loads(line[len('data: '):]) for line in body.splitlines() if line.startswith('data: ')]
+    assert [event.get('reasoning') for event in events[:2]] == [{"action_chosen": "ACTION1"}, {"action_chosen": "ACTION2"}]
+
+
+def test_disabled_stream_does_not_load_the_recording(client, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'ensure_source_loaded', lambda visualizer: pytest.fail('recording loaded'))
+    response = client.get('/api/stream', query_string={"game_id": GAME_ID, "recording_id": RECORDING_ID})
+    assert response.status_code == 503
+
+
+def test_lean_frames_with_reasoning(client):
+    lean = get_frames(client, start=0, end=3, lean=1, encoding='delta').get_json()
+    assert all('reasoning' not in frame for frame in lean['frames'])
+    body = get_frames(client, start=0, end=3, lean=1, encoding='delta', reasoning=1).get_json()
+    assert [frame['reasoning'] for frame in body['frames']] == [
+        {"action_chosen": f"ACTION{i % 6 + 1}"} for i in range(3)]
+    assert all('session_id' not in frame for frame in body['frames'])
+
+
+def test_reasoning_range(client):
+    params = {"game_id": GAME_ID, "recording_id": RECORDING_ID, "start": 15, "end": 50}
+    body = client.get('/api/reasoning', query_string=params).get_json()
+    assert (body['start'], body['end']) == (15, 20)
+    assert [item['frame_index'] for item in body['frames']] == list(range(16, 21))
+    assert body['frames'][0]['action_chosen'] == 'ACTION4'
+    params['start'] = 20
+    assert client.get('/api/reasoning', query_string=params).status_code == 400
+
+
+def test_thumbnails_follow_the_listing_policy(client, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'is_cloud', True)
+    assert client.get(f'/api/thumbnail/{GAME_ID}/{RECORDING_ID}').status_code == 403
+    monkeypatch.setattr(app_module, 'is_cloud', False)
+    response = client.get(f'/api/thumbnail/{GAME_ID}/not-a-recording')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "Invalid game_id or recording_id"
+
+
+def test_fetch_progress_rejects_invalid_ids(client):
+    assert client.get(f'/api/fetch_progress/{GAME_ID}/not-a-recording').status_code == 400
+    assert client.get(f'/api/fetch_progress/{GAME_ID}/{RECORDING_ID}').status_code == 404
@@ -0,0 +1,144 @@
+import os
+import time
+from contextlib import nullcontext
+
+import pytest
+
+from cache_manager import RecordingCacheManager, recording_filename
+
+GAME_ID = 'ft09-16726c5b26ff'
+
+
+def recording_id(number: int) -> str:
+    return f"00000000-0000-0000-0000-{number:012d}"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RecordingCacheManager(tmp_path, lock_for=lambda game_id, recording_id, blocking=True: nullcontext(),
+                                 protect_seconds=600)
+
+
+def add(cache, number: int, age: float, size: int = 1000) -> str:
+    """Cache a recording last accessed ``age`` seconds ago"""
+    name = recording_filename(GAME_ID, recording_id(number))
+    (cache.storage_dir / name).write_bytes(b'x' * (size - 1) + b'\n')
+    cache.record(GAME_ID, recording_id(number))
+    with cache._connect() as conn:
+        conn.execute("UPDATE recordings SET last_access = ? WHERE name = ?", (time.time() - age, name))
+    return name
+
+
+def cached_names(cache):
+    return sorted(entry['name'] for entry in cache.entries())
+
+
+def test_evicts_least_recently_used(cache):
+    names = [add(cache, number, age) for number, age in enumerate((3000, 1000, 2000))]
+    cache.max_entries = 2
+
+    assert cache.enforce_limits()['evicted'] == 1
+    assert cached_names(cache) == sorted(names[1:])
+    assert not (cache.storage_dir / names[0]).exists()
+
+
+def test_recently_accessed_recordings_are_protected(cache):
+    old = add(cache, 1, 3000)
+    recent = [add(cache, number, 10) for number in (2, 3)]
+    cache.max_bytes = 1500
+
+    result = cache.enforce_limits()
+
+    assert result['evicted'] == 1
+    assert cached_names(cache) == sorted(recent)
+    assert not (cache.storage_dir / old).exists()
+
+
+def test_keep_is_never_evicted(cache):
+    kept = add(cache, 1, 3000)
+    add(cache, 2, 2000)
+    cache.max_entries = 1
+
+    cache.enforce_limits(keep=kept)
+
+    assert cached_names(cache) == [kept]
+
+
+def test_compression_waits_for_protect_seconds(cache):
+    in_use = add(cache, 1, 120)
+    cold = add(cache, 2, 3000)
+    cache.compress_after = 60
+
+    assert cache.enforce_limits()['compressed'] == 1
+    assert cache.is_compressed(GAME_ID, recording_id(2))
+    assert not cache.is_compressed(GAME_ID, recording_id(1))
+    assert (cache.storage_dir / in_use).exists()
+    assert not (cache.storage_dir / cold).exists()
+
+
+def test_touch_protects_a_recording(cache):
+    add(cache, 1, 3000)
+    add(cache, 2, 2000)
+    cache.touch(GAME_ID, recording_id(1))
+    cache.max_entries = 1
+
+    cache.enforce_limits()
+
+    assert cached_names(cache) == [recording_filename(GAME_ID, recording_id(1))]
+
+
+def test_failed_removal_is_retried(cache, monkeypatch):
+    name = add(cache, 1, 3000)
+    (cache.storage_dir / (name + '.grids')).write_bytes(b'grids')
+    add(cache, 2, 10)
+    cache.max_entries = 1
+    unlink = os.unlink
+
+    def locked_grids(path, *args, **kwargs):
+        if str(path).endswith('.grids'):
+            raise PermissionError(f"{path} is in use")
+        return unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, 'unlink', locked_grids)
+    assert cache.enforce_limits()['evicted'] == 0
+    assert name in cached_names(cache)
+
+    monkeypatch.setattr(os, 'unlink', unlink)
+    assert cache.enforce_limits()['evicted'] == 1
+    assert name not in cached_names(cache)
+    assert not (cache.storage_dir / name).exists()
+
+
+def test_working_files_count_toward_the_byte_limit(cache):
+    recording = add(cache, 1, 3000)
+    working = cache.storage_dir / 'decompressed'
+    working.mkdir()
+    old_copy = working / 'old.jsonl'
+    old_copy.write_bytes(b'x' * 2000)
+    os.utime(old_copy, (time.time() - 3000, time.time() - 3000))
+    new_copy = working / 'new.jsonl'
+    new_copy.write_bytes(b'x' * 2000)
+    cache.max_bytes = 3500
+
+    assert cache.stats()['total_bytes'] == 5000
+    result = cache.enforce_limits()
+
+    assert result == {"compressed": 0, "evicted": 0, "scratch_removed": 1}
+    assert not old_copy.exists() and new_copy.exists()
+    assert (cache.storage_dir / recording).exists()
+    assert cache.stats()['scratch_bytes'] == 2000
+
+
+def test_touch_times_do_not_grow_without_bound(cache, monkeypatch):
+    monkeypatch.setattr('cache_manager.TOUCHED_MAX_KEYS', 10)
+    name = add(cache, 1, 3000)
+    cache.touch(GAME_ID, recording_id(1))
+    assert name in cache._touched
+
+    cache.remove(GAME_ID, recording_id(1))
+    assert name not in cache._touched
+
+    for number in range(20):
+        cache._should_touch(str(number), time.time() - 2 * 60)
+    cache._should_touch('fresh', time.time())
+    assert list(cache._touched) == ['fresh']
@@ -0,0 +1,76 @@
+import io
+import random
+
+import pytest
+
+from export import GifWriter, lzw_encode
+
+
+def lzw_decode(data: bytes, min_code_size: int) -> bytes:
+    """Reference GIF LZW decoder"""
+    clear = 1 << min_code_size
+    end = clear + 1
+    position = 0
+    code_size = min_code_size + 1
+    table = []
+    previous = None
+    out = bytearray()
+    while True:
+        code = 0
+        for bit in range(code_size):
+            byte = data[(position + bit) // 8]
+            code |= ((byte >> ((position + bit) % 8)) & 1) << bit
+        position += code_size
+        if code == clear:
+            table = [bytes([value]) for value in range(clear)] + [b'', b'']
+            code_size = min_code_size + 1
+            previous = None
+            continue
+        if code == end:
+            return bytes(out)
+        if previous is None:
+            entry = table[code]
+        else:
+            entry = table[code] if code < len(table) else previous + previous[:1]
+            if len(table) < 4096:
+                table.append(previous + entry[:1])
+            if len(table) == 1 << code_size and code_size < 12:
+                code_size += 1
+        out += entry
+        previous = entry
+
+
+@pytest.mark.parametrize('pixels', [
+    b'',
+    b'\x03',
+    b'\x01' * 1000,
+    bytes(i % 16 for i in range(500)),
+    bytes(random.Random(0).randrange(16) for _ in range(20000)),
+])
+def test_lzw_round_trip(pixels):
+    assert lzw_decode(lzw_encode(pixels, 4), 4) == pixels
+
+
+def test_gif_writer_frames():
+    palette = (bytes(range(48)), b'')
+    pixels = bytes(i % 16 for i in range(12))
+    f = io.BytesIO()
+    writer = GifWriter(f, 4, 3, palette)
+    writer.add(0, 0, 4, 3, pixels, 0.2)
+    writer.close()
+    data = f.getvalue()
+
+    assert data[:6] == b'GIF89a'
+    assert data[6:10] == b'\x04\x00\x03\x00'
+    assert data[-1:] == b'\x3B'
+    # Graphic control extension carries the delay in centiseconds
+    control = data.index(b'\x21\xF9\x04')
+    assert data[control + 4:control + 6] == b'\x14\x00'
+    descriptor = data.index(b'\x2C', control)
+    assert data[descriptor + 10] == 4
+    blocks = bytearray()
+    position = descriptor + 11
+    while data[position]:
+        blocks += data[position + 1:position + 1 + data[position]]
+        position += 1 + data[position]
+    assert lzw_decode(bytes(blocks), 4) == pixels
@@ -0,0 +1,35 @@
+from frame_delta import compute_delta, diff_runs
+
+
+def frame(grid):
+    return {"data": {"frame": grid}}
+
+
+def test_diff_runs_groups_consecutive_columns():
+    before = bytes([0, 0, 0, 0,
+                    1, 1, 1, 1])
+    after = bytes([0, 5, 6, 0,
+                   1, 1, 1, 9])
+    assert diff_runs(before, after, 2, 4) == [[0, 1, [5, 6]], [1, 3, [9]]]
+    assert diff_runs(before, before, 2, 4) == []
+
+
+def test_compute_delta_runs_on_the_displayed_layer():
+    frames = [
+        frame([[[7, 7], [7, 7]], [[0, 0, 0], [0, 0, 0]]]),
+        frame([[[1, 1], [1, 1]], [[0, 2, 3], [0, 0, 4]]]),
+    ]
+    assert compute_delta(frames, 0, 1) == {"runs": [[0, 1, [2, 3]], [1, 2, [4]]], "changed_cells": 3}
+
+
+def test_compute_delta_sends_the_full_layer_when_the_shape_changes():
+    frames = [frame([[[0, 0], [0, 0]]]), frame([[[1, 2, 3]]])]
+    assert compute_delta(frames, 0, 1) == {"full": [[1, 2, 3]]}
+
+
+def test_compute_delta_matches_applying_runs(frames):
+    for index in range(1, len(frames)):
+        layer = [row[:] for row in frames[index - 1]['data']['frame'][-1]]
+        for row, col, values in compute_delta(frames, index - 1, index)['runs']:
+            layer[row][col:col + len(values)] = values
+        assert layer == frames[index]['data']['frame'][-1]
@@ -0,0 +1,37 @@
+import pytest
+
+from grid_store import cells_to_grid, encode_grid, pack_cells, unpack_cells
+
+
+@pytest.mark.parametrize('cells', [
+    b'',
+    b'\x07',
+    bytes(range(16)),
+    bytes(i % 16 for i in range(1001)),
+    b'\x0f' * 64,
+])
+def test_pack_unpack_round_trip(cells):
+    packed = pack_cells(cells)
+    assert len(packed) == (len(cells) + 1) // 2
+    assert unpack_cells(packed, len(cells)) == cells
+
+
+def test_first_cell_is_the_high_nibble():
+    assert pack_cells(b'\x01\x02\x0a') == b'\x12\xa0'
+
+
+def test_encode_grid_round_trip():
+    grid = [[[row * 4 + col for col in range(4)] for row in range(4)], [[15] * 4 for _ in range(4)]]
+    layers, height, width, packed = encode_grid(grid)
+    assert (layers, height, width) == (2, 4, 4)
+    assert cells_to_grid(unpack_cells(packed, layers * height * width), layers, height, width) == grid
+
+
+@pytest.mark.parametrize('grid', [
+    [[[1, 2], [3]]],
+    [[[16, 0]]],
+    [[[1.5, 0]]],
+    'not a grid',
+])
+def test_encode_grid_rejects_unpackable_grids(grid):
+    assert encode_grid(grid) is None
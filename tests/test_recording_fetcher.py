@@ -0,0 +1,195 @@
+import os
+import time
+import threading
+
+import pytest
+
+from conftest import GAME_ID, RECORDING_ID
+from frame_index import IndexedRecording, LiveRecording, RecordingUnavailable
+import recording_fetcher
+from recording_fetcher import RecordingFetcher, file_lock
+
+
+@pytest.fixture
+def make_fetcher(tmp_path, recording_server):
+    def make(**kwargs):
+        kwargs.setdefault('max_retries', 2)
+        return RecordingFetcher(storage_dir=str(tmp_path / 'cache'), base_url=recording_server.url,
+                                chunk_size=16, timeout=5, **kwargs)
+    return make
+
+
+def part_files(fetcher):
+    return [name for name in os.listdir(fetcher.storage_dir) if name.endswith('.part')]
+
+
+def test_download_writes_recording_and_sidecars(make_fetcher, frames):
+    fetcher = make_fetcher()
+    path = fetcher.download_recording(GAME_ID, RECORDING_ID)
+
+    assert path == str(fetcher.storage_dir / f"{GAME_ID}-{RECORDING_ID}.jsonl")
+    assert part_files(fetcher) == []
+    recording = IndexedRecording.open(path, fetcher.get_index_path(path), fetcher.get_grid_path(path))
+    assert len(recording) == len(frames)
+    assert recording.grids is not None
+    assert recording[7]['data'] == frames[7]['data']
+    assert fetcher.get_progress(GAME_ID, RECORDING_ID)['done']
+
+
+def test_cached_recording_is_not_downloaded_again(make_fetcher, recording_server):
+    fetcher = make_fetcher()
+    first = fetcher.download_recording(GAME_ID, RECORDING_ID)
+    assert fetcher.download_recording(GAME_ID, RECORDING_ID) == first
+    assert make_fetcher().download_recording(GAME_ID, RECORDING_ID) == first
+    assert len(recording_server.hits) == 1
+
+
+def test_concurrent_downloads_are_coalesced(make_fetcher, recording_server, frames):
+    fetcher = make_fetcher()
+    # A second fetcher on the same directory stands in for another worker process
+    other_worker = make_fetcher()
+    recording_server.gate.clear()
+
+    progress = fetcher.start_download(GAME_ID, RECORDING_ID)
+    assert fetcher.start_download(GAME_ID, RECORDING_ID) is progress
+    assert recording_server.first_chunk_sent.wait(5)
+
+    results = []
+    waiters = [threading.Thread(target=lambda f=f: results.append(f.download_recording(GAME_ID, RECORDING_ID)))
+               for f in (fetcher, other_worker)]
+    for waiter in waiters:
+        waiter.start()
+    recording_server.gate.set()
+    for waiter in waiters:
+        waiter.join(10)
+
+    assert progress.finished.wait(5)
+    assert results == [progress.path, progress.path]
+    assert len(recording_server.hits) == 1
+    assert progress.frames == len(frames)
+
+
+def test_frames_are_served_from_the_partial_file(make_fetcher, recording_server, frames):
+    fetcher = make_fetcher()
+    recording_server.gate.clear()
+    progress = fetcher.start_download(GAME_ID, RECORDING_ID)
+    assert progress.frames_ready.wait(5)
+
+    live = LiveRecording(progress)
+    assert progress.partial_path.endswith('.part')
+    assert live.filepath == progress.partial_path
+    assert not live.complete
+    assert live[0]['data'] == frames[0]['data']
+
+    recording_server.gate.set()
+    assert progress.finished.wait(5)
+    assert live.complete
+    assert live.filepath == progress.path
+    assert len(live) == len(frames)
+    assert live[len(frames) - 1]['data'] == frames[-1]['data']
+    assert part_files(fetcher) == []
+
+
+def test_interrupted_download_is_retried(make_fetcher, recording_server, frames):
+    fetcher = make_fetcher()
+    recording_server.truncate = 1
+
+    path = fetcher.download_recording(GAME_ID, RECORDING_ID)
+
+    assert path is not None
+    assert len(recording_server.hits) == 2
+    assert fetcher.get_progress(GAME_ID, RECORDING_ID)['attempt'] == 2
+    assert part_files(fetcher) == []
+    recording = IndexedRecording.open(path, fetcher.get_index_path(path))
+    assert len(recording) == len(frames)
+
+
+def test_failed_download_leaves_nothing_behind(make_fetcher, recording_server):
+    fetcher = make_fetcher()
+    recording_server.fail = 2
+
+    assert fetcher.download_recording(GAME_ID, RECORDING_ID) is None
+
+    progress = fetcher.get_progress(GAME_ID, RECORDING_ID)
+    assert progress['done'] and progress['error']
+    assert part_files(fetcher) == []
+    assert not fetcher.is_cached(GAME_ID, RECORDING_ID)
+    assert fetcher.cache.entries() == []
+
+
+def test_lock_is_released_between_attempts(make_fetcher, recording_server):
+    fetcher = make_fetcher()
+    recording_server.fail = 1
+    progress = fetcher.start_download(GAME_ID, RECORDING_ID)
+    lock_path = fetcher.get_lock_path(GAME_ID, RECORDING_ID)
+
+    # Other workers can take the lock while the first attempt's backoff runs
+    deadline = time.monotonic() + 0.8
+    acquired = False
+    while not acquired and time.monotonic() < deadline:
+        try:
+            with file_lock(lock_path, blocking=False):
+                acquired = recording_server.hits != []
+        except BlockingIOError:
+            pass
+        time.sleep(0.05)
+    assert acquired
+    assert progress.finished.wait(5)
+    assert progress.path is not None
+
+
+def test_failed_download_makes_served_frames_unavailable(make_fetcher, recording_server):
+    fetcher = make_fetcher(max_retries=1)
+    recording_server.truncate = 1
+    progress = fetcher.start_download(GAME_ID, RECORDING_ID)
+    assert progress.finished.wait(5)
+
+    # Frames indexed from the first half are known, but the partial file is gone
+    live = LiveRecording(progress)
+    assert progress.path is None
+    assert len(live) > 0
+    with pytest.raises(RecordingUnavailable, match='failed'):
+        live.read_line(0)
+
+
+def test_file_lock_polls_under_gevent(tmp_path, monkeypatch):
+    monkeypatch.setattr(recording_fetcher, 'gevent_patched', lambda: True)
+    lock_path = str(tmp_path / 'locks' / 'recording.lock')
+    held = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with file_lock(lock_path):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    assert held.wait(5)
+    with pytest.raises(BlockingIOError):
+        with file_lock(lock_path, blocking=False):
+            pass
+    threading.Timer(0.2, release.set).start()
+    started = time.monotonic()
+    with file_lock(lock_path):
+        assert time.monotonic() - started >= 0.1
+    thread.join(5)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_summaries_run_in_forked_workers(make_fetcher):
+    fetcher = make_fetcher()
+    ran = []
+    fetcher.summarize = lambda game_id, recording_id: ran.append(os.getpid())
+    # The pool is first used before the fork, as by backfill_indexes under gunicorn --preload
+    fetcher.summarize_later(GAME_ID, RECORDING_ID)
+    time.sleep(0.2)
+
+    pid = os.fork()
+    if pid == 0:
+        fetcher.summarize_later(GAME_ID, RECORDING_ID)
+        deadline = time.monotonic() + 5
+        while os.getpid() not in ran and time.monotonic() < deadline:
+            time.sleep(0.05)
+        os._exit(0 if os.getpid() in ran else 1)
+    assert os.waitpid(pid, 0)[1] == 0
@@ -0,0 +1,18 @@
+import pytest
+
+from search_index import SearchIndex
+
+GAME_ID = 'ft09-16726c5b26ff'
+RECORDING_ID = '00000000-0000-0000-0000-000000000001'
+
+
+@pytest.mark.parametrize('fts', [True, False])
+def test_reasoning_search_matches_wildcards_literally(tmp_path, fts):
+    index = SearchIndex(tmp_path)
+    index.fts = index.fts and fts
+    texts = ['sure 100% of the time', 'sure 1000 times', 'move_left', 'move left']
+    index.replace(GAME_ID, RECORDING_ID, [(frame, None, None, None, text) for frame, text in enumerate(texts)])
+
+    assert [hit['frame'] for hit in index.search(text='100%')] == [0]
+    if not index.fts:
+        assert [hit['frame'] for hit in index.search(text='move_left')] == [2]